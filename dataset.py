@@ -0,0 +1,272 @@
+# dataset.py
+"""
+Hard-Example Capture
+Samples frames the detector is unsure about (confidence in an uncertain
+band) or where it lost the drone, and writes them with YOLO-format
+pseudo-labels for retraining. Writing, perceptual-hash deduplication and
+disk budgeting run on a background thread.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Configuration constants
+ENABLED       = False                # Capture from the live vision loop (yolo.process_frame)
+DATASET_DIR   = "dataset/captured"   # YOLO layout: images/ and labels/ below this
+BAND_LOW      = 0.15                 # Drone confidence range that counts as uncertain;
+                                     # inference runs with conf=BAND_LOW while capturing
+BAND_HIGH     = 0.5
+TRACK_MAX_AGE = 0.5                  # Seconds the last box is trusted as a label after a loss
+MIN_INTERVAL  = 0.5                  # Seconds between captured frames
+DEDUP_BITS    = 6                    # Hashes within this Hamming distance are duplicates
+DEDUP_WINDOW  = 5000                 # Recent hashes kept for deduplication
+MAX_BYTES     = 2 * 1024 ** 3        # Disk budget; oldest samples are deleted beyond it
+MAX_PENDING   = 8                    # Frames queued for writing before new ones are dropped
+JPEG_QUALITY  = 95
+REPLAY_FPS    = 30.0                 # Frame rate assumed for replay timing
+IMAGE_EXTS    = (".jpg", ".jpeg", ".png", ".bmp")
+DRONE_CLASS   = 0
+
+_capture = None
+
+
+def dhash(image):
+    """
+    64-bit difference hash of a BGR image: robust to small shifts,
+    noise and recompression.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def yolo_labels(boxes, width, height):
+    """
+    Format (cls, x1, y1, x2, y2) pixel boxes as YOLO label lines
+    (class, normalized centre x/y, width, height).
+    """
+    lines = []
+    for cls, x1, y1, x2, y2 in boxes:
+        cx, cy = (x1 + x2) / 2 / width, (y1 + y2) / 2 / height
+        w, h = (x2 - x1) / width, (y2 - y1) / height
+        lines.append(f"{int(cls)} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}")
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+class DatasetCapture:
+    def __init__(self, root=DATASET_DIR):
+        """
+        Prepare the output folders, index existing samples for the disk
+        budget and start the background writer thread.
+        """
+        self.root = root
+        self.image_dir = os.path.join(root, "images")
+        self.label_dir = os.path.join(root, "labels")
+        os.makedirs(self.image_dir, exist_ok=True)
+        os.makedirs(self.label_dir, exist_ok=True)
+
+        self.saved = 0                         # Samples written
+        self.duplicates = 0                    # Samples skipped as near-duplicates
+        self.dropped = 0                       # Samples lost to a full queue
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._recent = deque(maxlen=DEDUP_WINDOW)
+        self._files = deque()                  # (stem, bytes) of samples on disk, oldest first
+        self._bytes = 0
+        self._index_existing()
+
+        self._last_box = None                  # (cls, x1, y1, x2, y2) of the last confident fix
+        self._last_box_at = float("-inf")
+        self._last_capture = float("-inf")
+        self._seq = 0
+        self._queue = queue.Queue(maxsize=MAX_PENDING)
+        self._thread = threading.Thread(target=self._writer_thread, daemon=True)
+        self._thread.start()
+
+    def _index_existing(self):
+        """
+        Account for samples from earlier runs, oldest first.
+        """
+        for name in sorted(os.listdir(self.image_dir)):
+            stem = os.path.splitext(name)[0]
+            size = os.path.getsize(os.path.join(self.image_dir, name))
+            label = os.path.join(self.label_dir, stem + ".txt")
+            if os.path.exists(label):
+                size += os.path.getsize(label)
+            self._files.append((stem, size))
+            self._bytes += size
+
+    def offer(self, image, data, now=None):
+        """
+        Consider one processed frame for capture. Cheap unless the frame is
+        selected, in which case it is copied and queued.
+
+        Args:
+            image: BGR frame exactly as the model saw it (may be a reused buffer).
+            data: (N, 6) detections x1, y1, x2, y2, conf, cls in image pixels.
+        """
+        now = time.monotonic() if now is None else now
+        drone = data[data[:, 5] == DRONE_CLASS]
+        best = drone[drone[:, 4].argmax()] if len(drone) else None
+
+        if best is not None and best[4] >= BAND_HIGH:
+            # Confident fix: the tracker state that labels later losses
+            self._last_box = (DRONE_CLASS, *best[:4])
+            self._last_box_at = now
+            return
+        if now - self._last_capture < MIN_INTERVAL:
+            return
+
+        if best is not None and best[4] >= BAND_LOW:
+            reason = "uncertain"
+            boxes = [(int(d[5]), *d[:4]) for d in data if d[4] >= BAND_LOW]
+        elif now - self._last_box_at <= TRACK_MAX_AGE:
+            reason = "lost"
+            boxes = [self._last_box]   # Drone barely moves between frames: keep its last box
+        else:
+            return                      # No drone and no recent track: nothing to label
+
+        self._last_capture = now
+        self._seq += 1
+        try:
+            self._queue.put_nowait((f"{time.strftime('%Y%m%d-%H%M%S')}_{self._seq:06d}_{reason}",
+                                    image.copy(), boxes))
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer_thread(self):
+        """
+        Thread target: deduplicate, write image and label, enforce MAX_BYTES.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            stem, image, boxes = item
+            h = np.uint64(dhash(image))
+            if len(self._hashes):
+                distance = np.unpackbits((self._hashes ^ h).view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+                if distance.min() <= DEDUP_BITS:
+                    self.duplicates += 1
+                    continue
+            self._recent.append(h)
+            self._hashes = np.fromiter(self._recent, dtype=np.uint64, count=len(self._recent))
+
+            image_path = os.path.join(self.image_dir, stem + ".jpg")
+            label_path = os.path.join(self.label_dir, stem + ".txt")
+            cv2.imwrite(image_path, image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            with open(label_path, "w") as f:
+                f.write(yolo_labels(boxes, image.shape[1], image.shape[0]))
+            size = os.path.getsize(image_path) + os.path.getsize(label_path)
+            self._files.append((stem, size))
+            self._bytes += size
+            self.saved += 1
+
+            while self._bytes > MAX_BYTES and len(self._files) > 1:
+                old, old_size = self._files.popleft()
+                for path in (os.path.join(self.image_dir, old + ".jpg"),
+                             os.path.join(self.label_dir, old + ".txt")):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._bytes -= old_size
+
+    def close(self):
+        """
+        Write what is queued and stop the writer thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        print(f"[DATA] {self.saved} samples saved, {self.duplicates} duplicates skipped, "
+              f"{self.dropped} dropped; {self._bytes / 1e6:.0f} MB in {self.root}")
+
+
+def start(root=DATASET_DIR):
+    """
+    Begin capturing to root (replaces any active capture).
+    """
+    global _capture
+    stop()
+    _capture = DatasetCapture(root)
+    print(f"[DATA] Capturing hard examples to {root}")
+
+
+def stop():
+    """
+    Finish the active capture, if any.
+    """
+    global _capture
+    if _capture is not None:
+        _capture.close()
+        _capture = None
+
+
+def active():
+    """
+    Returns:
+        bool: True while a capture is running (yolo lowers its model cutoff).
+    """
+    return _capture is not None
+
+
+def offer(image, result, now=None):
+    """
+    Offer a frame and its Ultralytics result to the active capture; no-op when not capturing.
+    """
+    cap = _capture
+    if cap is not None:
+        cap.offer(image, result.boxes.data.cpu().numpy(), now)
+
+
+def replay_frames(source):
+    """
+    Yield BGR frames one at a time from an image directory or a video file.
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(IMAGE_EXTS):
+                frame = cv2.imread(os.path.join(source, name))
+                if frame is not None:
+                    yield frame
+        return
+    cap = cv2.VideoCapture(source)
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+def capture_replay(source, root=DATASET_DIR):
+    """
+    Run the current model over recorded frames (image directory or video),
+    mirrored as in the live loop, and capture their hard examples.
+    Frames are timed at REPLAY_FPS rather than by processing speed.
+    """
+    import yolo  # deferred: yolo imports this module
+    model = yolo.initialize_model()
+    start(root)
+    try:
+        for i, frame in enumerate(replay_frames(source)):
+            mirrored = yolo.mirror(frame)
+            result = model(mirrored, imgsz=yolo.INFER_SIZE, conf=BAND_LOW, verbose=yolo.DEBUG)[0]
+            offer(mirrored, result, i / REPLAY_FPS)
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: dataset.py REPLAY_SOURCE [OUTPUT_DIR]")
+    capture_replay(sys.argv[1], *sys.argv[2:3])
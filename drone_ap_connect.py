@@ -1,103 +1,300 @@
 import time  # time delays
 import subprocess  # shell commands
 import platform  # OS detection
+import shutil  # executable lookup
+import threading  # background link monitor
 import atexit  # exit handler
 
 TELLO_SSID = "TELLO-E9C59F"  # drone network SSID
-CHECK_INTERVAL = 2  # seconds between connection attempts
+POLL_INTERVAL = 1.0  # seconds between link checks while connected
+BACKOFF_MIN = 0.5  # first delay between failed connection attempts
+BACKOFF_MAX = 8.0  # longest delay between failed connection attempts
+STATE_TTL = 3.0  # seconds a cached SSID reading stays valid while the link is healthy
+SIMULATE_WIFI = False  # use FakeBackend: bench runs where the AP is joined by hand
 
 _saved_ssid = None
+manager = None  # APManager started by run(), or None
 
-def get_current_wifi():
+
+class NetshBackend:
+    """Windows Wi-Fi control through netsh."""
+
+    def current_ssid(self):
+        """
+        Returns:
+            str or None: SSID of the active WLAN connection
+        """
+        try:
+            output = subprocess.check_output(
+                ["netsh", "wlan", "show", "interfaces"], text=True
+            )  # query WLAN status
+            for line in output.splitlines():
+                if "SSID" in line and "BSSID" not in line:
+                    return line.split(":", 1)[1].strip()  # extract SSID
+        except Exception:
+            pass
+        return None
+
+    def disconnect(self):
+        """
+        Disconnects current Wi-Fi.
+        """
+        try:
+            subprocess.run(["netsh", "wlan", "disconnect"], check=True)
+        except Exception:
+            pass  # ignore failures
+
+    def connect(self, ssid):
+        """
+        Args:
+            ssid (str): SSID (profile name) to connect
+        """
+        try:
+            subprocess.run(
+                ["netsh", "wlan", "connect", f"name={ssid}"],
+                stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True
+            )  # connect by profile name
+        except Exception:
+            pass
+
+
+class NmcliBackend:
+    """Linux Wi-Fi control through NetworkManager's nmcli."""
+
+    def current_ssid(self):
+        """
+        Returns:
+            str or None: SSID of the active Wi-Fi connection
+        """
+        try:
+            output = subprocess.check_output(
+                ["nmcli", "-t", "-f", "ACTIVE,SSID", "dev", "wifi", "list", "--rescan", "no"],
+                text=True
+            )  # cached scan results, no rescan
+            for line in output.splitlines():
+                active, _, ssid = line.partition(":")
+                if active == "yes":
+                    return ssid.replace("\\:", ":")  # unescape terse output
+        except Exception:
+            pass
+        return None
+
+    def disconnect(self):
+        """
+        Disconnects every Wi-Fi device.
+        """
+        try:
+            output = subprocess.check_output(
+                ["nmcli", "-t", "-f", "DEVICE,TYPE", "dev"], text=True
+            )
+            for line in output.splitlines():
+                device, _, kind = line.partition(":")
+                if kind == "wifi":
+                    subprocess.run(["nmcli", "dev", "disconnect", device],
+                                   stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        except Exception:
+            pass  # ignore failures
+
+    def connect(self, ssid):
+        """
+        Args:
+            ssid (str): SSID to connect
+        """
+        try:
+            subprocess.run(
+                ["nmcli", "dev", "wifi", "connect", ssid],
+                stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True
+            )
+        except Exception:
+            pass
+
+
+class FakeBackend:
+    """In-memory backend for bench runs without Wi-Fi control (SIMULATE_WIFI)."""
+
+    def __init__(self, ssid=None, reachable=(TELLO_SSID,)):
+        self.ssid = ssid  # currently joined network
+        self.reachable = set(reachable)  # networks connect() can join
+        self.connects = 0  # number of connect() calls
+
+    def current_ssid(self):
+        return self.ssid
+
+    def disconnect(self):
+        self.ssid = None
+
+    def connect(self, ssid):
+        self.connects += 1
+        if ssid in self.reachable:
+            self.ssid = ssid
+
+    def drop(self):
+        """
+        Simulate losing the link.
+        """
+        self.ssid = None
+
+
+def default_backend():
     """
     Returns:
-        str or None: current SSID if on Windows, else None
-    """
-    if platform.system() != "Windows":
-        return None  # unsupported on non-Windows
-    try:
-        output = subprocess.check_output(
-            ["netsh", "wlan", "show", "interfaces"], text=True
-        )  # query WLAN status
-        for line in output.splitlines():
-            if "SSID" in line and "BSSID" not in line:
-                return line.split(":", 1)[1].strip()  # extract SSID
-    except Exception:
-        pass
+        backend for this OS, or None if Wi-Fi control is unsupported
+    """
+    if SIMULATE_WIFI:
+        return FakeBackend()
+    system = platform.system()
+    if system == "Windows":
+        return NetshBackend()
+    if system == "Linux" and shutil.which("nmcli"):
+        return NmcliBackend()
     return None
 
-def disconnect_wifi():
+
+class APManager:
     """
-    Disconnects current Wi-Fi on Windows.
+    Keeps the ground station joined to the drone AP on a background thread.
+    `ready` is set while the link is up; `generation` counts (re)connections.
     """
-    if platform.system() != "Windows":
-        return
-    try:
-        subprocess.run(["netsh", "wlan", "disconnect"], check=True)
-    except Exception:
-        pass  # ignore failures
 
-def attempt_connect(ssid):
+    def __init__(self, ssid=TELLO_SSID, backend=None):
+        self.ssid = ssid
+        self.backend = backend or default_backend()
+        self.ready = threading.Event()  # set while joined to self.ssid
+        self.generation = 0  # incremented on every successful (re)connect
+        self._cached_ssid = None  # last SSID reading
+        self._cached_at = float("-inf")  # monotonic time of that reading
+        self._stop = threading.Event()
+        self._thread = None
+
+    def current_ssid(self, max_age=STATE_TTL):
+        """
+        Returns:
+            str or None: current SSID, from cache if younger than max_age
+        """
+        now = time.monotonic()
+        if now - self._cached_at > max_age:
+            self._cached_ssid = self.backend.current_ssid()
+            self._cached_at = now
+        return self._cached_ssid
+
+    def start(self):
+        """
+        Launch the link monitor thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._monitor_thread, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the link monitor thread.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=POLL_INTERVAL + 1)
+
+    def wait_ready(self, timeout=None):
+        """
+        Returns:
+            bool: True once the link is up, False on timeout
+        """
+        return self.ready.wait(timeout)
+
+    def _monitor_thread(self):
+        """
+        Thread target: checks the link every POLL_INTERVAL and reconnects
+        with exponential backoff when it is down. While the link is healthy
+        the SSID is re-read at most every STATE_TTL; when it is down, every
+        check queries the backend.
+        """
+        print(f"[WIFI] Trying to join {self.ssid}...")
+        delay = BACKOFF_MIN
+        while not self._stop.is_set():
+            max_age = STATE_TTL if self.ready.is_set() else 0
+            if self.current_ssid(max_age) == self.ssid:
+                if not self.ready.is_set():
+                    self.generation += 1
+                    print(f"[WIFI] Connected to {self.ssid}")
+                    self.ready.set()
+                delay = BACKOFF_MIN
+                self._stop.wait(POLL_INTERVAL)
+                continue
+
+            if self.ready.is_set():
+                print(f"[WIFI] Lost {self.ssid}, reconnecting...")
+                self.ready.clear()
+            if self._cached_ssid is not None:
+                self.backend.disconnect()  # drop other network
+            self.backend.connect(self.ssid)  # try join
+            if self.current_ssid(max_age=0) == self.ssid:
+                continue  # joined: mark ready on the next pass
+            self._stop.wait(delay)  # wait before retry
+            delay = min(delay * 2, BACKOFF_MAX)
+
+
+def wait_ready(timeout=None):
+    """
+    Blocks until the drone AP link is up. Returns True immediately when
+    no manager is running (unsupported OS or AP handled externally).
+    """
+    if manager is None:
+        return True
+    return manager.wait_ready(timeout)
+
+
+def link_generation():
     """
-    Args:
-        ssid (str): SSID to connect
     Returns:
-        bool: True if now connected, else False
-    """
-    if platform.system() != "Windows":
-        return False
-    try:
-        subprocess.run(
-            ["netsh", "wlan", "connect", f"name={ssid}"],
-            stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True
-        )  # connect by profile name
-    except Exception:
-        return False
-    return get_current_wifi() == ssid  # verify
+        int: number of (re)connections so far (0 without a manager)
+    """
+    return manager.generation if manager else 0
+
 
 def save_current_ssid():
     """
     Stores current network SSID in module global.
     """
     global _saved_ssid
-    _saved_ssid = get_current_wifi()  # capture original
+    _saved_ssid = manager.current_ssid()  # capture original (first read: never cached)
     print(f"[WIFI] Saved SSID: {_saved_ssid}")
 
+
 def restore_saved_ssid():
     """
     Reconnects to the SSID saved earlier.
     """
-    if not _saved_ssid:
+    if manager is None:
+        return
+    manager.stop()  # stop the monitor so it does not rejoin the drone
+    if not _saved_ssid or _saved_ssid == manager.ssid:
         print("[WIFI] No SSID to restore.")
         return
-    attempt_connect(_saved_ssid)  # reconnect
+    manager.backend.connect(_saved_ssid)  # reconnect
     print(f"[WIFI] Restored SSID: {_saved_ssid}")
 
 atexit.register(restore_saved_ssid)  # ensure restore on exit
 
 def connect_to_tello():
     """
-    Loops until drone SSID is active.
+    Blocks until drone SSID is active.
     """
-    print(f"[WIFI] Trying to join {TELLO_SSID}...")
-    while True:
-        current = get_current_wifi()  # check active SSID
-        if current == TELLO_SSID:
-            print(f"[WIFI] Connected to {TELLO_SSID}")
-            break
-        disconnect_wifi()  # drop existing
-        attempt_connect(TELLO_SSID)  # try join
-        time.sleep(CHECK_INTERVAL)  # wait before retry
+    manager.wait_ready()
 
-def run():
+def run(backend=None):
     """
-    Saves original SSID, then connects to drone.
+    Saves original SSID, then starts the background AP manager.
+    Returns immediately; use wait_ready() before talking to the drone.
     """
-    if platform.system() != "Windows":
+    global manager
+    backend = backend or default_backend()
+    if backend is None:
         print("[WIFI] Unsupported OS. Exiting.")
         return
+    manager = APManager(TELLO_SSID, backend)
     save_current_ssid()  # preserve before change
-    connect_to_tello()  # join drone network
+    manager.start()  # join drone network in the background
 
 if __name__ == "__main__":
     run()  # start process
+    if manager:
+        connect_to_tello()  # wait for the drone network
@@ -0,0 +1,298 @@
+# flight_log.py
+"""
+Flight Recorder
+Appends timestamped, fixed-size binary records (vision fixes, commands,
+responses, retries, waypoints, telemetry) to a mission log on a background
+thread, and loads whole flights back into NumPy arrays for analysis.
+"""
+
+import os
+import sys
+import queue
+import threading
+import time
+
+import numpy as np
+
+import link_monitor as LINK
+
+# Configuration constants
+LOG_DIR     = "flight_logs"   # Directory for mission logs
+LOG_EXT     = ".tlog"         # File extension for mission logs
+MAGIC       = b"TLOG0001"     # File header; records follow immediately
+MAX_PENDING = 10000           # Records buffered before new ones are dropped
+FLUSH_EVERY = 0.25            # Seconds between writer flushes
+
+# Record kinds
+FIX      = 0  # Vision fix: x, y in pixels
+COMMAND  = 1  # Command sent: text, seq, attempt
+RESPONSE = 2  # Response received: text, seq, value = RTT in seconds
+RETRY    = 3  # Waypoint retry: x, y = target, attempt
+WAYPOINT = 4  # Waypoint started: x, y = target
+ARRIVAL  = 5  # Waypoint finished: x, y = target, value = 1 reached / 0 failed
+STATE    = 6  # Telemetry: text = field name, value = reading
+
+KIND_NAMES = ("FIX", "COMMAND", "RESPONSE", "RETRY", "WAYPOINT", "ARRIVAL", "STATE")
+
+# 48-byte little-endian record; the file is a header followed by a flat array
+RECORD_DTYPE = np.dtype([
+    ("t",       "<f8"),   # Seconds since the log was opened
+    ("kind",    "u1"),    # One of the record kinds above
+    ("attempt", "u1"),    # Retry / resend attempt number
+    ("seq",     "<u2"),   # Command sequence number (links COMMAND/RESPONSE)
+    ("x",       "<f4"),   # Position or target X
+    ("y",       "<f4"),   # Position or target Y
+    ("value",   "<f4"),   # Kind-specific scalar (RTT, reached flag, reading)
+    ("text",    "S24"),   # Command / response / field name (truncated)
+])
+
+NAN = float("nan")
+
+
+class FlightRecorder:
+    def __init__(self, path):
+        """
+        Open a new log file and start the background writer thread.
+        path: destination file; parent directories are created.
+        """
+        self.path = path
+        self.dropped = 0                   # Records lost to a full queue
+        self._t0 = time.monotonic()        # Log time origin
+        self._seq = 0                      # Last command sequence number
+        self._queue = queue.Queue(maxsize=MAX_PENDING)
+        self._stop = threading.Event()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._thread = threading.Thread(target=self._writer_thread, daemon=True)
+        self._thread.start()
+
+    def record(self, kind, x=NAN, y=NAN, value=NAN, text="", seq=0, attempt=0):
+        """
+        Queue one record. Never blocks: drops the record if the writer is behind.
+        """
+        if isinstance(text, str):
+            text = text.encode("ascii", "replace")
+        rec = (time.monotonic() - self._t0, kind, min(attempt, 255),
+               seq & 0xFFFF, x, y, value, text[:24])
+        try:
+            self._queue.put_nowait(rec)
+        except queue.Full:
+            self.dropped += 1
+
+    def next_seq(self):
+        """
+        Return a new command sequence number.
+        """
+        self._seq += 1
+        return self._seq
+
+    def _writer_thread(self):
+        """
+        Thread target: drains the queue in batches and appends them to the file.
+        """
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=FLUSH_EVERY))
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                self._file.write(np.array(batch, dtype=RECORD_DTYPE).tobytes())
+                self._file.flush()
+
+    def close(self):
+        """
+        Flush pending records and close the file.
+        """
+        self._stop.set()
+        self._thread.join()
+        self._file.close()
+        if self.dropped:
+            print(f"[LOG] Dropped {self.dropped} records (writer behind).")
+
+
+# Active recorder for the current mission (None when not recording)
+_recorder = None
+
+
+def start(path=None):
+    """
+    Begin recording to path (default: timestamped file in LOG_DIR).
+    Returns the log path.
+    """
+    global _recorder
+    stop()
+    if path is None:
+        path = os.path.join(LOG_DIR, time.strftime("%Y%m%d-%H%M%S") + LOG_EXT)
+    _recorder = FlightRecorder(path)
+    print(f"[LOG] Recording flight to {path}")
+    return path
+
+
+def stop():
+    """
+    Finish the active recording, if any.
+    """
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        print(f"[LOG] Flight log closed: {_recorder.path}")
+        _recorder = None
+
+
+def record(kind, **fields):
+    """
+    Append a record to the active log; no-op when not recording.
+    """
+    rec = _recorder
+    if rec is not None:
+        rec.record(kind, **fields)
+
+
+def record_command(cmd, attempt=1):
+    """
+    Log an outgoing command and return its sequence number (0 if not recording).
+    """
+    rec = _recorder
+    if rec is None:
+        return 0
+    seq = rec.next_seq()
+    rec.record(COMMAND, text=cmd, seq=seq, attempt=attempt)
+    return seq
+
+
+def load(path):
+    """
+    Memory-map a flight log as a structured array of RECORD_DTYPE.
+    A trailing partial record (e.g. from a crash) is ignored.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a flight log")
+    count = (os.path.getsize(path) - len(MAGIC)) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r",
+                     offset=len(MAGIC), shape=(count,))
+
+
+def response_commands(log):
+    """
+    Returns:
+        (responses, commands): the RESPONSE records and, for each, the text
+        of the COMMAND it answers (latest COMMAND with the same seq; "" if none).
+    """
+    linked = log[(log["kind"] == COMMAND) | (log["kind"] == RESPONSE)]
+    sent = {}
+    commands = []
+    for kind, seq, text in zip(linked["kind"], linked["seq"], linked["text"]):
+        if kind == COMMAND:
+            sent[seq] = text.decode("utf-8", errors="ignore")
+        else:
+            commands.append(sent.get(seq, ""))
+    return linked[linked["kind"] == RESPONSE], commands
+
+
+def command_rtts(log, motion=False):
+    """
+    Returns:
+        np.ndarray: round-trip time in seconds of every answered query, or of
+        every answered move if motion (a move is answered once it is flown,
+        so this is its duration). Timeouts and resets, logged as "(...)",
+        are excluded.
+    """
+    responses, commands = response_commands(log)
+    answered = ~np.char.startswith(responses["text"], b"(")
+    moves = np.array([LINK.is_motion(cmd) for cmd in commands], dtype=bool)
+    return responses["value"][answered & (moves == motion)].astype(np.float64)
+
+
+def time_to_waypoint(log):
+    """
+    Returns:
+        (targets, durations, reached): (N, 2) waypoint targets, seconds from
+        WAYPOINT to its ARRIVAL record, and the reached flag for each.
+        Waypoints without an ARRIVAL get NaN duration and False.
+    """
+    starts = log[log["kind"] == WAYPOINT]
+    ends = log[log["kind"] == ARRIVAL]
+    targets = np.stack([starts["x"], starts["y"]], axis=1).astype(np.float64)
+
+    idx = np.searchsorted(ends["t"], starts["t"], side="left")
+    valid = idx < len(ends)
+    idx = np.minimum(idx, max(len(ends) - 1, 0))
+    durations = np.full(len(starts), np.nan)
+    reached = np.zeros(len(starts), dtype=bool)
+    if len(ends):
+        durations[valid] = ends["t"][idx[valid]] - starts["t"][valid]
+        reached[valid] = ends["value"][idx[valid]] > 0.5
+    return targets, durations, reached
+
+
+def overshoot(log):
+    """
+    For each waypoint leg, the farthest the drone went past its target along
+    the direction of travel (pixels, 0 if it never crossed).
+
+    Returns:
+        np.ndarray: overshoot per waypoint (NaN if the leg has no fixes).
+    """
+    starts = log[log["kind"] == WAYPOINT]
+    fixes = log[log["kind"] == FIX]
+    fix_t = fixes["t"]
+    fix_xy = np.stack([fixes["x"], fixes["y"]], axis=1).astype(np.float64)
+
+    bounds = np.append(starts["t"], np.inf)
+    lo = np.searchsorted(fix_t, bounds[:-1], side="left")
+    hi = np.searchsorted(fix_t, bounds[1:], side="left")
+
+    result = np.full(len(starts), np.nan)
+    for i in range(len(starts)):
+        leg = fix_xy[lo[i]:hi[i]]
+        if len(leg) == 0:
+            continue
+        target = np.array([starts["x"][i], starts["y"][i]], dtype=np.float64)
+        direction = target - leg[0]
+        norm = np.hypot(*direction)
+        if norm == 0:
+            result[i] = 0.0
+            continue
+        past = (leg - target) @ (direction / norm)
+        result[i] = max(0.0, float(past.max()))
+    return result
+
+
+def summarize(path):
+    """
+    Print a short analysis of a flight log.
+    """
+    log = load(path)
+    print(f"[LOG] {path}: {len(log)} records")
+    if len(log) == 0:
+        return
+    print(f"[LOG] Duration: {log['t'][-1]:.1f} s")
+    counts = np.bincount(log["kind"], minlength=len(KIND_NAMES))
+    print("[LOG] " + ", ".join(f"{n}={c}" for n, c in zip(KIND_NAMES, counts)))
+
+    rtts = command_rtts(log)
+    if len(rtts):
+        p50, p90, p99 = np.percentile(rtts, [50, 90, 99]) * 1000
+        print(f"[LOG] Query RTT ms: p50={p50:.0f} p90={p90:.0f} p99={p99:.0f} max={rtts.max() * 1000:.0f}")
+    moves = command_rtts(log, motion=True)
+    if len(moves):
+        p50, p90 = np.percentile(moves, [50, 90])
+        print(f"[LOG] Move duration s: p50={p50:.1f} p90={p90:.1f} max={moves.max():.1f}")
+
+    targets, durations, reached = time_to_waypoint(log)
+    over = overshoot(log)
+    for (x, y), d, ok, o in zip(targets, durations, reached, over):
+        print(f"[LOG] Waypoint ({x:.0f},{y:.0f}): {d:.1f} s, reached={ok}, overshoot={o:.0f} px")
+
+
+if __name__ == "__main__":
+    for log_path in sys.argv[1:]:
+        summarize(log_path)
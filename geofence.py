@@ -0,0 +1,255 @@
+# geofence.py
+"""
+Geofence
+Flight area polygon and no-fly zones rasterized into a grid index over the
+overlay, so planned legs and live vision fixes are checked with a few
+array lookups. Planned legs that leave the safe area are held; a live fix
+outside it makes udp_logic land.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+import mission
+import navigation as NAV
+
+# Safety areas in overlay coordinates (same frame as waypoints and fixes)
+FENCE_INSET = 50              # Default fence: the overlay inset by this much
+FENCE = [
+    (FENCE_INSET, FENCE_INSET),
+    (mission.VIRTUAL_WIDTH - FENCE_INSET, FENCE_INSET),
+    (mission.VIRTUAL_WIDTH - FENCE_INSET, mission.VIRTUAL_HEIGHT - FENCE_INSET),
+    (FENCE_INSET, mission.VIRTUAL_HEIGHT - FENCE_INSET),
+]
+NO_FLY_ZONES = []             # Polygons [(x, y), ...] the drone must never enter
+
+# Grid index
+CELL = 8                      # Grid cell size (overlay px)
+BUFFER = 60                   # Band around forbidden areas where legs may not end (overlay px)
+BREACH_FIXES = 5              # Consecutive forbidden fixes before a breach is latched
+
+# Cell levels
+CLEAR = 0                     # Safe to fly and to stop
+NEAR = 1                      # Within BUFFER of a boundary: fly through, never stop
+FORBIDDEN = 2                 # Outside the fence or inside a no-fly zone
+LEVEL_NAMES = ("clear", "near boundary", "forbidden")
+
+# Overlay px per cm, to turn Tello commands back into overlay displacements
+PX_PER_CM = 1.0 / NAV.coord_to_cm(1.0, 0.0)[0]
+
+_grid = None                  # (rows, cols) uint8 levels, built on first use
+_fix_level = CLEAR            # Level of the latest live fix
+_forbidden_run = 0            # Consecutive forbidden fixes so far
+_breach = threading.Event()   # Set when a live fix was FORBIDDEN
+
+
+def inside(polygon, x, y):
+    """
+    Even-odd point-in-polygon test, vectorized over the points x, y.
+    """
+    poly = np.asarray(polygon, dtype=np.float64)
+    result = np.zeros(np.shape(x), dtype=bool)
+    for (x1, y1), (x2, y2) in zip(poly, np.roll(poly, -1, axis=0)):
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            at_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        result ^= crosses & (x < at_x)
+    return result
+
+
+def dilate(mask, cells):
+    """
+    Grow a boolean grid by a square of the given radius in cells.
+    """
+    out = mask.copy()
+    for _ in range(cells):
+        grown = out.copy()
+        grown[1:, :] |= out[:-1, :]
+        grown[:-1, :] |= out[1:, :]
+        grown[:, 1:] |= out[:, :-1]
+        grown[:, :-1] |= out[:, 1:]
+        out = grown
+    return out
+
+
+def build(fence=None, zones=None):
+    """
+    Rasterize the fence and no-fly zones into the grid index.
+    A cell is FORBIDDEN if any part of it may be outside the safe area.
+    """
+    global _grid
+    fence = FENCE if fence is None else fence
+    zones = NO_FLY_ZONES if zones is None else zones
+
+    cols = math.ceil(mission.VIRTUAL_WIDTH / CELL)
+    rows = math.ceil(mission.VIRTUAL_HEIGHT / CELL)
+    cx, cy = np.meshgrid((np.arange(cols) + 0.5) * CELL, (np.arange(rows) + 0.5) * CELL)
+
+    forbidden = ~inside(fence, cx, cy)
+    for zone in zones:
+        forbidden |= inside(zone, cx, cy)
+    forbidden = dilate(forbidden, 1)  # cells whose centre is safe but whose edge is not
+
+    grid = np.full((rows, cols), CLEAR, dtype=np.uint8)
+    grid[dilate(forbidden, math.ceil(BUFFER / CELL))] = NEAR
+    grid[forbidden] = FORBIDDEN
+    _grid = grid
+    return grid
+
+
+def grid():
+    """
+    Returns:
+        np.ndarray: the grid index, built from FENCE and NO_FLY_ZONES on first use.
+    """
+    return _grid if _grid is not None else build()
+
+
+def levels(points):
+    """
+    Level of every point in an (N, 2) array; points off the overlay are FORBIDDEN.
+    """
+    g = grid()
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    col = np.floor(pts[:, 0] / CELL).astype(np.intp)
+    row = np.floor(pts[:, 1] / CELL).astype(np.intp)
+    on_grid = (col >= 0) & (col < g.shape[1]) & (row >= 0) & (row < g.shape[0])
+    out = np.full(len(pts), FORBIDDEN, dtype=np.uint8)
+    out[on_grid] = g[row[on_grid], col[on_grid]]
+    return out
+
+
+def level_at(x, y):
+    """
+    Level of a single point (scalar fast path for every vision fix).
+    """
+    g = grid()
+    col, row = int(x // CELL), int(y // CELL)
+    if 0 <= col < g.shape[1] and 0 <= row < g.shape[0]:
+        return int(g[row, col])
+    return FORBIDDEN
+
+
+def sample_segments(path):
+    """
+    Points every half cell along a polyline [(x, y), ...], endpoints included,
+    and the index of the segment each point belongs to.
+    """
+    pts = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    if len(pts) < 2:
+        return pts, np.zeros(len(pts), dtype=np.intp)
+    starts, ends = pts[:-1], pts[1:]
+    counts = np.maximum(np.ceil(np.hypot(*(ends - starts).T) / (CELL / 2)).astype(np.intp), 1)
+    seg = np.repeat(np.arange(len(starts)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / counts[seg]
+    points = np.vstack([starts[seg] + (ends[seg] - starts[seg]) * t[:, None], pts[-1:]])
+    return points, np.append(seg, len(starts) - 1)
+
+
+def sample(path):
+    """
+    Points every half cell along a polyline [(x, y), ...], endpoints included.
+    """
+    return sample_segments(path)[0]
+
+
+def check_path(path):
+    """
+    Level of a planned polyline: FORBIDDEN if any point on it is, NEAR if it
+    ends near a boundary, otherwise CLEAR.
+    """
+    lv = levels(sample(path))
+    if (lv == FORBIDDEN).any():
+        return FORBIDDEN
+    return int(lv[-1])
+
+
+def command_path(start, cmds):
+    """
+    Overlay polyline the drone follows when it executes Tello move commands
+    from start (inverse of navigation.calculate_from_pixels).
+    """
+    x, y = start
+    path = [(x, y)]
+    for cmd in cmds:
+        direction, value = cmd.split()
+        d = int(value) * PX_PER_CM
+        if direction == "forward":
+            x += d
+        elif direction == "back":
+            x -= d
+        elif direction == "right":
+            y -= d
+        elif direction == "left":
+            y += d
+        path.append((x, y))
+    return path
+
+
+def check_commands(start, cmds):
+    """
+    Level of the leg flown by sending cmds from position start.
+    """
+    if start is None:
+        return FORBIDDEN  # no fix: the leg cannot be checked
+    return check_path(command_path(start, cmds))
+
+
+def route_levels(points):
+    """
+    Per-waypoint level for a mission: the waypoint itself and the leg from
+    the previous one, flown as udp_logic does (forward along x, then sideways).
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    result = levels(pts)
+    if len(pts) < 2:
+        return result
+    # All legs as one polyline: waypoint, corner, waypoint, corner, ...
+    corners = np.column_stack([pts[1:, 0], pts[:-1, 1]])
+    path = np.empty((2 * len(pts) - 1, 2))
+    path[0::2], path[1::2] = pts, corners
+    samples, seg = sample_segments(path)
+    # Segments 2i and 2i+1 form the leg to waypoint i+1
+    crossed = np.bincount(seg // 2, weights=levels(samples) == FORBIDDEN, minlength=len(pts) - 1) > 0
+    result[1:][crossed] = FORBIDDEN
+    return result
+
+
+def on_fix(location):
+    """
+    Check a live fix. BREACH_FIXES consecutive FORBIDDEN fixes set the
+    breach flag udp_logic lands on; a single false detection does not.
+
+    Returns:
+        int: the fix level.
+    """
+    global _fix_level, _forbidden_run
+    level = level_at(*location)
+    if level != _fix_level:
+        print(f"[FENCE] Drone {LEVEL_NAMES[level]} at {location}")
+        _fix_level = level
+    _forbidden_run = _forbidden_run + 1 if level == FORBIDDEN else 0
+    if _forbidden_run >= BREACH_FIXES and not _breach.is_set():
+        print(f"[FENCE] Breach: {_forbidden_run} consecutive fixes outside the safe area")
+        _breach.set()
+    return level
+
+
+def breached():
+    """
+    Returns:
+        bool: True once a live fix was outside the safe area.
+    """
+    return _breach.is_set()
+
+
+def reset():
+    """
+    Clear the breach flag at the start of a mission.
+    """
+    global _fix_level, _forbidden_run
+    _fix_level = CLEAR
+    _forbidden_run = 0
+    _breach.clear()
@@ -1,8 +1,12 @@
 import tkinter as tk
+from collections import deque
 from tkinter import Button
+import mission
+import startup
+import telemetry
 
 # Virtual canvas dimensions (logical units)
-VIRTUAL_WIDTH, VIRTUAL_HEIGHT = 1920, 1080
+VIRTUAL_WIDTH, VIRTUAL_HEIGHT = mission.VIRTUAL_WIDTH, mission.VIRTUAL_HEIGHT
 
 # Grid settings
 GRID_SIZE = 50              # Distance between grid lines
@@ -20,88 +24,185 @@ WAYPOINT_RADIUS = 35          # Radius of waypoint markers
 TEXT_COLOR = "black"         # Color of waypoint label text
 TEXT_FONT = ("Arial", 15, "bold")  # Font for waypoint labels
 
-# Constraints for adding waypoints
-MIN_DELTA_X = 256             # Minimum horizontal distance between successive waypoints
-MIN_DELTA_Y = 144             # Minimum vertical distance between successive waypoints
-MIN_ALLOWED_AXIS_DELTA = 5    # Minimum movement along an axis to count as intentional
-MIN_EDGE_MARGIN = 150         # Margin from the edges where clicks are ignored
+# Live drone marker settings
+DRONE_COLOR = "orange"       # Color of the live drone marker and trail
+DRONE_RADIUS = 20             # Radius of the live drone marker
+TRAIL_WIDTH = 4               # Thickness of the drone trail
+TRAIL_LENGTH = 200            # Number of recent positions kept in the trail
+REFRESH_MS = 16               # Render tick interval (~60 Hz display refresh)
+
+# Telemetry HUD settings
+HUD_COLOR = "black"          # Color of HUD text
+HUD_FONT = ("Consolas", 14, "bold")  # Font for HUD text
+HUD_POS = (20, 20)            # Top-left corner of the HUD (screen pixels)
 
 # State variables
 waypoints = []        # Recorded logical coordinates of waypoints
 recording = False     # Flag: are we currently recording clicks?
-destination_list = [] # Final list of waypoints for the drone
+destination_list = mission.destination_list  # Final list of waypoints for the drone
+hud_values = {}       # Latest telemetry values shown on the HUD
+
+# Canvas item IDs kept for incremental, in-place updates
+grid_items = []       # (line_id, axis, logical offset) for each grid line
+route_items = []      # (vert_id, horiz_id, oval_id, text_id) per drawn waypoint
+drone_item = None     # Live drone marker oval
+trail_item = None     # Live drone trail polyline
+trail_points = deque(maxlen=TRAIL_LENGTH)  # Recent drone positions (logical)
+hud_item = None       # HUD text item
 
 # GUI objects (initialized later)
-root = tk.Tk()
+root = None           # Created in initialize_gui so importing gui needs no display
 canvas = None
 rec_btn = None
 scale_x = 1.0
 scale_y = 1.0
 
+def to_screen(x, y):
+    """
+    Convert logical coords to screen coords (invert Y axis).
+    """
+    return x * scale_x, (VIRTUAL_HEIGHT - y) * scale_y
+
 def draw_grid():
     """
     Draws a grid over the canvas to match the virtual coordinate space.
+    Lines are created once; later calls move them in place.
     """
-    canvas.delete("grid")
-    # Draw vertical lines
-    for x in range(0, VIRTUAL_WIDTH, GRID_SIZE):
-        sx = x * scale_x
-        canvas.create_line(sx, 0, sx, VIRTUAL_HEIGHT * scale_y,
-                           fill=GRID_COLOR, tags="grid")
-    # Draw horizontal lines
-    for y in range(0, VIRTUAL_HEIGHT, GRID_SIZE):
-        sy = y * scale_y
-        canvas.create_line(0, sy, VIRTUAL_WIDTH * scale_x, sy,
-                           fill=GRID_COLOR, tags="grid")
+    if not grid_items:
+        for x in range(0, VIRTUAL_WIDTH, GRID_SIZE):
+            grid_items.append((canvas.create_line(0, 0, 0, 0, fill=GRID_COLOR, tags="grid"), "x", x))
+        for y in range(0, VIRTUAL_HEIGHT, GRID_SIZE):
+            grid_items.append((canvas.create_line(0, 0, 0, 0, fill=GRID_COLOR, tags="grid"), "y", y))
+
+    for item, axis, offset in grid_items:
+        if axis == "x":
+            # Vertical line
+            sx = offset * scale_x
+            canvas.coords(item, sx, 0, sx, VIRTUAL_HEIGHT * scale_y)
+        else:
+            # Horizontal line
+            sy = offset * scale_y
+            canvas.coords(item, 0, sy, VIRTUAL_WIDTH * scale_x, sy)
 
 def draw_waypoints():
     """
-    Draws the recorded waypoints and connecting route on the canvas.
+    Draws any recorded waypoints not yet on the canvas: the route segment
+    from the previous waypoint plus the new marker and label.
     """
-    canvas.delete("route")
-
-    # Draw connecting lines between waypoints
-    for i in range(1, len(waypoints)):
-        x0, y0 = waypoints[i - 1]
-        x1, y1 = waypoints[i]
-
-        # Convert logical coords to screen coords (invert Y axis)
-        draw_x0 = x0 * scale_x
-        draw_y0 = (VIRTUAL_HEIGHT - y0) * scale_y
-        draw_x1 = x1 * scale_x
-        draw_y1 = (VIRTUAL_HEIGHT - y1) * scale_y
-
-        # Vertical segment: solid green
-        canvas.create_line(draw_x0, draw_y0, draw_x0, draw_y1,
-                           fill=ROUTE_COLOR_VERT, width=LINE_WIDTH,
-                           tags="route")
-        # Horizontal segment: dashed blue
-        canvas.create_line(draw_x0, draw_y1, draw_x1, draw_y1,
-                           fill=ROUTE_COLOR_HORIZ, dash=ROUTE_DASH,
-                           width=LINE_WIDTH, tags="route")
-
-    # Draw waypoint markers and labels
-    for i, (x, y) in enumerate(waypoints):
-        draw_x = x * scale_x
-        draw_y = (VIRTUAL_HEIGHT - y) * scale_y
+    # Waypoints were cleared since the last draw: start over
+    if len(route_items) > len(waypoints):
+        canvas.delete("route")
+        route_items.clear()
+
+    for i in range(len(route_items), len(waypoints)):
+        draw_x, draw_y = to_screen(*waypoints[i])
+
+        vert = horiz = None
+        if i > 0:
+            draw_x0, draw_y0 = to_screen(*waypoints[i - 1])
+            # Vertical segment: solid green
+            vert = canvas.create_line(draw_x0, draw_y0, draw_x0, draw_y,
+                                      fill=ROUTE_COLOR_VERT, width=LINE_WIDTH,
+                                      tags=("route", "route_line"))
+            # Horizontal segment: dashed blue
+            horiz = canvas.create_line(draw_x0, draw_y, draw_x, draw_y,
+                                       fill=ROUTE_COLOR_HORIZ, dash=ROUTE_DASH,
+                                       width=LINE_WIDTH, tags=("route", "route_line"))
+            # Keep lines underneath the existing markers
+            canvas.tag_lower(vert, "route_marker")
+            canvas.tag_lower(horiz, "route_marker")
 
         # Circle for the waypoint
-        canvas.create_oval(
+        oval = canvas.create_oval(
             draw_x - WAYPOINT_RADIUS, draw_y - WAYPOINT_RADIUS,
             draw_x + WAYPOINT_RADIUS, draw_y + WAYPOINT_RADIUS,
-            fill=WAYPOINT_COLOR, tags="route"
+            fill=WAYPOINT_COLOR, tags=("route", "route_marker")
         )
         # Number label inside the circle
-        canvas.create_text(
+        text = canvas.create_text(
             draw_x, draw_y,
             text=str(i + 1), fill=TEXT_COLOR,
-            font=TEXT_FONT, tags="route"
+            font=TEXT_FONT, tags=("route", "route_marker")
         )
+        route_items.append((vert, horiz, oval, text))
+
+    # Live drone stays on top of the route
+    canvas.tag_raise("drone")
+
+def draw_drone(location):
+    """
+    Moves the live drone marker to location and extends its trail.
+    """
+    global drone_item, trail_item
+    trail_points.append(location)
+    draw_x, draw_y = to_screen(*location)
+
+    if drone_item is None:
+        trail_item = canvas.create_line(0, 0, 0, 0, fill=DRONE_COLOR,
+                                        width=TRAIL_WIDTH, tags="drone")
+        drone_item = canvas.create_oval(0, 0, 0, 0, fill=DRONE_COLOR, tags="drone")
+
+    canvas.coords(
+        drone_item,
+        draw_x - DRONE_RADIUS, draw_y - DRONE_RADIUS,
+        draw_x + DRONE_RADIUS, draw_y + DRONE_RADIUS
+    )
+    if len(trail_points) >= 2:
+        flat = [c for point in trail_points for c in to_screen(*point)]
+        canvas.coords(trail_item, *flat)
+
+def format_hud():
+    """
+    Build the HUD text from the latest telemetry values.
+    """
+    def fmt(key, spec, sep=None):
+        value = hud_values.get(key)
+        if value is None:
+            return "--"
+        if isinstance(value, tuple):
+            parts = [format(v, spec) for v in value]
+            return sep.join(parts) if sep else "(" + ",".join(parts) + ")"
+        return format(value, spec)
+
+    return (
+        f"POS {fmt('position', '.0f')}  TARGET {fmt('target', '.0f')}  "
+        f"WP {fmt('progress', 'd', '/')}  BAT {fmt('battery', 'd')}%\n"
+        f"FPS {fmt('fps', '.1f')}  INFER {fmt('inference_ms', '.0f')} ms  "
+        f"CMD {fmt('command_ms', '.0f')} ms  LINK {fmt('link', 's')}"
+    )
+
+def draw_hud():
+    """
+    Updates the HUD text item in place.
+    """
+    global hud_item
+    if hud_item is None:
+        hud_item = canvas.create_text(*HUD_POS, anchor="nw", fill=HUD_COLOR,
+                                      font=HUD_FONT, tags="hud")
+    canvas.itemconfig(hud_item, text=format_hud())
+
+def render_tick():
+    """
+    Periodic render at the display refresh rate: drains pending telemetry,
+    draws new waypoints, the latest drone position and the HUD,
+    then reschedules itself.
+    """
+    if len(route_items) != len(waypoints):
+        draw_waypoints()
+
+    updates = telemetry.drain()
+    if updates.get("position") is not None:
+        draw_drone(updates["position"])
+    if updates:
+        hud_values.update(updates)
+        draw_hud()
+
+    root.after(REFRESH_MS, render_tick)
 
 def on_click(event):
     """
     Handler for mouse clicks: records waypoints when in recording mode,
-    enforcing margin and distance constraints.
+    enforcing the mission margin and distance constraints.
     """
     if not recording:
         return
@@ -110,38 +211,18 @@ def on_click(event):
     x = event.x / scale_x
     y = VIRTUAL_HEIGHT - (event.y / scale_y)
 
-    # Ignore clicks too close to edges
-    if (x < MIN_EDGE_MARGIN or x > VIRTUAL_WIDTH - MIN_EDGE_MARGIN or
-        y < MIN_EDGE_MARGIN or y > VIRTUAL_HEIGHT - MIN_EDGE_MARGIN):
-        return
-
-    # If this is the first waypoint, just add it
-    if not waypoints:
-        waypoints.append((x, y))
-        draw_waypoints()
-        return
-
-    last_x, last_y = waypoints[-1]
-    dx = abs(x - last_x)
-    dy = abs(y - last_y)
-
-    # Enforce minimum movement in at least one axis while the other axis stays small
-    if (dx < MIN_DELTA_X and dx >= MIN_ALLOWED_AXIS_DELTA and dy >= MIN_DELTA_Y) or \
-       (dy < MIN_DELTA_Y and dy >= MIN_ALLOWED_AXIS_DELTA and dx >= MIN_DELTA_X):
-        pass
-    # If movement is too small overall, ignore click
-    elif dx < MIN_DELTA_X and dy < MIN_DELTA_Y:
+    # Ignore clicks near edges or too close to the last waypoint
+    if mission.check_next(waypoints, (x, y)) != mission.OK:
         return
 
-    # Record the valid waypoint and redraw
+    # Record the valid waypoint (drawn on the next render tick)
     waypoints.append((x, y))
-    draw_waypoints()
 
 def toggle_rec():
     """
     Toggles recording mode on and off. Clears waypoints if turning off.
     """
-    global recording, waypoints, destination_list
+    global recording
     if not recording:
         recording = True
         rec_btn.config(text="CLEAR")
@@ -152,16 +233,19 @@ def toggle_rec():
         waypoints.clear()
         destination_list.clear()
         canvas.delete("route")
+        route_items.clear()
 
 def start_drone():
     """
     Called when START button is pressed: copies recorded waypoints
-    to destination_list for the drone to follow.
+    to destination_list for the drone to follow and exports them
+    to mission.LAST_MISSION.
     """
-    global destination_list
     destination_list.clear()
     destination_list.extend(waypoints)
     print("Start pressed - saved waypoints to destination_list:", destination_list)
+    if waypoints:
+        mission.save(mission.LAST_MISSION, waypoints)
 
 def stop_drone():
     """
@@ -226,21 +310,25 @@ def initialize_screen_scaling():
 
 def initialize_gui():
     """
-    Set up the full GUI: scaling, window config, canvas, buttons,
-    event bindings, and initial grid draw.
+    Set up the full GUI: root window, scaling, window config, canvas,
+    buttons, event bindings, and initial grid draw.
     """
+    global root
+    root = tk.Tk()
     screen_width, screen_height = initialize_screen_scaling()
     configure_root_window(screen_width, screen_height)
     create_canvas(screen_width, screen_height)
     create_buttons()
     canvas.bind("<Button-1>", on_click)
     draw_grid()
+    render_tick()
 
 def run():
     """
     Entry point: initialize GUI and start the Tk event loop.
     """
     initialize_gui()
+    root.after_idle(startup.mark, "overlay shown")
     root.mainloop()
 
 if __name__ == "__main__":
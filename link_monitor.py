@@ -0,0 +1,205 @@
+# link_monitor.py
+"""
+Command Link Health
+Tracks round-trip times and losses of every Tello exchange, derives
+per-command reply timeouts from them, and sends keepalive queries while
+the link is idle so the drone does not auto-land.
+"""
+
+import threading
+import time
+from collections import deque
+
+# ─── Health tracking ─────────────────────────────────────────────────────────
+WINDOW         = 50     # Recent exchanges kept for RTT and loss statistics
+DOWN_AFTER     = 3      # Consecutive losses before the link counts as down
+DEGRADED_LOSS  = 0.2    # Loss rate above which the link counts as degraded
+DEGRADED_P90   = 1.0    # p90 RTT (s) above which the link counts as degraded
+
+# ─── Timeouts ────────────────────────────────────────────────────────────────
+MIN_TIMEOUT    = 1.0    # Never wait less than this for a reply (s)
+MAX_TIMEOUT    = 15.0   # Network wait with no statistics yet (the old fixed TIMEOUT)
+TIMEOUT_FACTOR = 3.0    # Network wait as a multiple of p99 RTT
+MOTION_MARGIN  = 15.0   # Minimum wait beyond the ideal flight time (acceleration, settling)
+MOVE_SPEED     = 50.0   # Assumed speed for distance commands (cm/s)
+TURN_SPEED     = 60.0   # Assumed rotation speed for cw/ccw (deg/s)
+FIXED_MOTION   = {"takeoff": 8.0, "land": 8.0, "flip": 3.0}  # Seconds per command
+DISTANCE_CMDS  = ("forward", "back", "left", "right", "up", "down")
+
+# ─── Keepalive ───────────────────────────────────────────────────────────────
+KEEPALIVE_IDLE = 5.0          # Idle seconds before a keepalive (Tello lands after ~15 s)
+KEEPALIVE_CMD  = "battery?"   # Cheap query that also refreshes the battery reading
+
+_lock = threading.Lock()
+_rtts = deque(maxlen=WINDOW)       # RTTs of answered non-motion exchanges (s)
+_outcomes = deque(maxlen=WINDOW)   # True for answered, False for lost exchanges
+_consecutive_losses = 0
+_last_activity = time.monotonic()  # Last command sent or reply received
+_keepalive = None
+
+
+def motion_time(cmd):
+    """
+    Returns:
+        float: seconds the drone needs to carry out cmd before it replies.
+    """
+    parts = cmd.split()
+    if not parts:
+        return 0.0
+    name = parts[0]
+    if name in FIXED_MOTION:
+        return FIXED_MOTION[name]
+    try:
+        if name in DISTANCE_CMDS:
+            return int(parts[1]) / MOVE_SPEED
+        if name in ("cw", "ccw"):
+            return int(parts[1]) / TURN_SPEED
+    except (IndexError, ValueError):
+        pass
+    return 0.0
+
+
+def mark_activity():
+    """
+    Note that a command was just sent (resets the keepalive idle timer).
+    """
+    global _last_activity
+    _last_activity = time.monotonic()
+
+
+def record(cmd, rtt):
+    """
+    Record one exchange: rtt in seconds, or None if no reply came.
+    RTTs of motion commands include the flight time and are not used
+    for network statistics.
+    """
+    global _consecutive_losses, _last_activity
+    with _lock:
+        _outcomes.append(rtt is not None)
+        if rtt is None:
+            _consecutive_losses += 1
+            return
+        _consecutive_losses = 0
+        _last_activity = time.monotonic()
+        if motion_time(cmd) == 0.0:
+            _rtts.append(rtt)
+
+
+def percentiles():
+    """
+    Returns:
+        tuple or None: (p50, p90, p99) RTT in seconds, None without data.
+    """
+    with _lock:
+        samples = sorted(_rtts)
+    if not samples:
+        return None
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return pick(0.50), pick(0.90), pick(0.99)
+
+
+def loss_rate():
+    """
+    Returns:
+        float: share of recent exchanges without a reply.
+    """
+    with _lock:
+        if not _outcomes:
+            return 0.0
+        return _outcomes.count(False) / len(_outcomes)
+
+
+def state():
+    """
+    Returns:
+        str: 'down', 'degraded' or 'good'.
+    """
+    if _consecutive_losses >= DOWN_AFTER:
+        return "down"
+    pct = percentiles()
+    if loss_rate() > DEGRADED_LOSS or (pct and pct[1] > DEGRADED_P90):
+        return "degraded"
+    return "good"
+
+
+def health():
+    """
+    Returns:
+        dict: state, RTT percentiles (s), loss rate and seconds since activity.
+    """
+    pct = percentiles() or (None, None, None)
+    return {
+        "state": state(),
+        "p50": pct[0], "p90": pct[1], "p99": pct[2],
+        "loss": loss_rate(),
+        "idle": time.monotonic() - _last_activity,
+    }
+
+
+def is_motion(cmd):
+    """
+    Returns:
+        bool: True if cmd moves the drone (its reply comes after the move).
+    """
+    return motion_time(cmd) > 0.0
+
+
+def timeout_for(cmd):
+    """
+    Reply timeout for cmd. Queries get a network margin of TIMEOUT_FACTOR x
+    p99 RTT, clamped to [MIN_TIMEOUT, MAX_TIMEOUT]. Motion commands get their
+    ideal flight time plus at least MOTION_MARGIN, since the drone only
+    replies after accelerating, flying and settling.
+    """
+    pct = percentiles()
+    network = MAX_TIMEOUT if pct is None else min(MAX_TIMEOUT, max(MIN_TIMEOUT, pct[2] * TIMEOUT_FACTOR))
+    if is_motion(cmd):
+        return motion_time(cmd) + max(network, MOTION_MARGIN)
+    return network
+
+
+class Keepalive:
+    def __init__(self, probe):
+        """
+        probe: callable that sends KEEPALIVE_CMD unless another exchange
+        is in flight; called whenever the link has been idle too long.
+        """
+        self.probe = probe
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._keepalive_thread, daemon=True)
+
+    def _keepalive_thread(self):
+        """
+        Thread target: polls the idle timer a few times per KEEPALIVE_IDLE.
+        """
+        while not self._stop.wait(KEEPALIVE_IDLE / 5):
+            if time.monotonic() - _last_activity >= KEEPALIVE_IDLE:
+                self.probe()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=MAX_TIMEOUT)
+
+
+def start_keepalive(probe):
+    """
+    Start sending keepalives through probe (replaces any running keepalive).
+    """
+    global _keepalive
+    stop_keepalive()
+    mark_activity()
+    _keepalive = Keepalive(probe)
+    _keepalive.start()
+
+
+def stop_keepalive():
+    """
+    Stop the keepalive thread, if running.
+    """
+    global _keepalive
+    if _keepalive is not None:
+        _keepalive.stop()
+        _keepalive = None
@@ -1,15 +1,23 @@
 # main.py
 
-import threading, gui, udp_logic, yolo, drone_ap_connect, drone_feed
+import startup  # first import: records process start for the timing breakdown
+import threading
+
+MULTI_CAMERA = False  # Track with every camera in multicam.CAMERAS instead of yolo.CAM_IDX
 
 def drone_cam_feed():
+    drone_feed = startup.timed_import("drone_feed")
     drone_feed.run() # Start the drone camera feed when 
 
 def ai_vision_tracking():
-    yolo.run() # Start the AI vision tracking
+    # Imported here so OpenCV/Ultralytics load in the background while the operator draws waypoints
+    vision = startup.timed_import("multicam" if MULTI_CAMERA else "yolo")
+    vision.run() # Start the AI vision tracking (loads and warms the model first)
 
 def udp_command_loop():
-    drone_ap_connect.run() # Connect to drone AP before running the mission
+    drone_ap_connect = startup.timed_import("drone_ap_connect")
+    udp_logic = startup.timed_import("udp_logic")
+    drone_ap_connect.run() # Start joining the drone AP in the background (udp_logic waits for it)
     udp_logic.run() # Start UDP logic
 
 if __name__ == "__main__":
@@ -18,4 +26,5 @@ if __name__ == "__main__":
 
     threading.Thread(target=udp_command_loop, daemon=True).start() # Start the UDP command loop
 
+    gui = startup.timed_import("gui") # Only Tk is needed before the overlay appears
     gui.run() # Tkinter needs to run in main thread to function properly because of its event loop
\ No newline at end of file
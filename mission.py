@@ -0,0 +1,171 @@
+# mission.py
+"""
+Mission Model
+Waypoint rules, vectorized validation, compact load/save of waypoint
+lists, and a headless entry point that flies a mission file without Tk.
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Virtual canvas dimensions (logical units)
+VIRTUAL_WIDTH, VIRTUAL_HEIGHT = 1920, 1080
+
+# Constraints for adding waypoints
+MIN_DELTA_X = 256             # Minimum horizontal distance between successive waypoints
+MIN_DELTA_Y = 144             # Minimum vertical distance between successive waypoints
+MIN_ALLOWED_AXIS_DELTA = 5    # Minimum movement along an axis to count as intentional
+MIN_EDGE_MARGIN = 150         # Margin from the edges where waypoints are rejected
+
+# File format: header followed by N little-endian float32 (x, y) pairs
+MAGIC = b"MISN0001"
+MISSION_EXT = ".mission"
+LAST_MISSION = os.path.join("missions", "last" + MISSION_EXT)  # Written on START
+
+# Validation result codes
+OK = 0          # Waypoint accepted
+EDGE = 1        # Too close to the canvas edge
+TOO_CLOSE = 2   # Too close to the previous waypoint on both axes
+FENCED = 3      # Near a geofence boundary, or the leg to it crosses one
+REASONS = ("ok", "too close to edge", "too close to previous waypoint", "outside geofence or in no-fly zone")
+
+# Final list of waypoints for the drone, shared by the GUI and udp_logic
+destination_list = []
+
+
+def as_points(points):
+    """
+    Coerce a waypoint sequence to an (N, 2) float64 array.
+    """
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+def validate(points):
+    """
+    Check a whole waypoint list in one vectorized pass.
+
+    Args:
+        points: (N, 2) logical coordinates in order of flight.
+    Returns:
+        np.ndarray: one result code per waypoint (OK, EDGE, TOO_CLOSE or FENCED).
+    """
+    import geofence  # deferred: geofence is built on this module's canvas
+    pts = as_points(points)
+    x, y = pts[:, 0], pts[:, 1]
+    codes = np.zeros(len(pts), dtype=np.uint8)
+
+    if len(pts) > 1:
+        d = np.abs(np.diff(pts, axis=0))
+        dx, dy = d[:, 0], d[:, 1]
+        # Minimum movement in one axis while the other axis stays small
+        intentional = (((dx < MIN_DELTA_X) & (dx >= MIN_ALLOWED_AXIS_DELTA) & (dy >= MIN_DELTA_Y)) |
+                       ((dy < MIN_DELTA_Y) & (dy >= MIN_ALLOWED_AXIS_DELTA) & (dx >= MIN_DELTA_X)))
+        # Movement too small overall
+        too_close = ~intentional & (dx < MIN_DELTA_X) & (dy < MIN_DELTA_Y)
+        codes[1:][too_close] = TOO_CLOSE
+
+    # Geofence: the drone must be able to stop at the waypoint and reach it
+    codes[geofence.route_levels(pts) != geofence.CLEAR] = FENCED
+
+    # Edge margin overrides: it is checked first when clicking
+    edge = ((x < MIN_EDGE_MARGIN) | (x > VIRTUAL_WIDTH - MIN_EDGE_MARGIN) |
+            (y < MIN_EDGE_MARGIN) | (y > VIRTUAL_HEIGHT - MIN_EDGE_MARGIN))
+    codes[edge] = EDGE
+    return codes
+
+
+def check_next(waypoints, point):
+    """
+    Validate a single new waypoint against the current list.
+
+    Returns:
+        int: result code for point.
+    """
+    if waypoints:
+        return int(validate([waypoints[-1], point])[-1])
+    return int(validate([point])[0])
+
+
+def save(path, points):
+    """
+    Write waypoints to a compact binary mission file.
+    """
+    pts = as_points(points).astype("<f4")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(pts.tobytes())
+
+
+def load(path):
+    """
+    Read a mission file.
+
+    Returns:
+        np.ndarray: (N, 2) float64 waypoints.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a mission file")
+        data = np.fromfile(f, dtype="<f4")
+    if len(data) % 2:
+        raise ValueError(f"{path} is truncated")
+    return data.reshape(-1, 2).astype(np.float64)
+
+
+def set_destinations(points):
+    """
+    Replace destination_list in place so every holder sees the new mission.
+    """
+    destination_list[:] = [tuple(p) for p in as_points(points).tolist()]
+
+
+def report(points):
+    """
+    Print validation errors for a waypoint list.
+
+    Returns:
+        bool: True if every waypoint is valid.
+    """
+    codes = validate(points)
+    for i in np.flatnonzero(codes):
+        print(f"[MISSION] Waypoint {i + 1} {tuple(as_points(points)[i])}: {REASONS[codes[i]]}")
+    return not codes.any()
+
+
+def run_headless(path, vision=True):
+    """
+    Fly a mission file without the Tk overlay: validate it, optionally start
+    the vision thread without a display, join the drone AP and run one
+    mission through udp_logic.
+    """
+    points = load(path)
+    print(f"[MISSION] Loaded {len(points)} waypoints from {path}")
+    if not len(points) or not report(points):
+        print("[MISSION] Mission rejected.")
+        return False
+
+    import udp_logic, drone_ap_connect  # deferred: mission is imported by both
+    udp_logic.SHOW_FEED = False
+    if vision:
+        import yolo
+        yolo.SHOW_DISPLAY = False
+        threading.Thread(target=yolo.run, daemon=True).start()
+
+    set_destinations(points)
+    drone_ap_connect.run()
+    udp_logic.run_mission()
+    return True
+
+
+if __name__ == "__main__":
+    usage = "usage: mission.py check FILE... | run FILE [--no-vision]"
+    if len(sys.argv) < 3 or sys.argv[1] not in ("check", "run"):
+        sys.exit(usage)
+    if sys.argv[1] == "check":
+        ok = all([report(load(p)) for p in sys.argv[2:]])
+        sys.exit(0 if ok else 1)
+    sys.exit(0 if run_headless(sys.argv[2], vision="--no-vision" not in sys.argv) else 1)
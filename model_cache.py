@@ -0,0 +1,103 @@
+# model_cache.py
+"""
+Model Cache
+Keeps exported copies of the detector (ONNX, OpenVINO, TorchScript, ...)
+on disk, keyed by weights hash, input size and format, so later launches
+load the optimized model directly instead of exporting again.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+
+CACHE_DIR = "model_cache"  # Root directory for cached model artifacts
+
+
+def weights_hash(path):
+    """
+    Returns:
+        str: short SHA-256 digest of the weights file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def entry_dir(weights, imgsz, fmt, dynamic=False):
+    """
+    Cache directory for one (weights, input size, format) combination.
+    Dynamic-shape exports (variable batch size) are cached separately.
+    """
+    suffix = "-dynamic" if dynamic else ""
+    return os.path.join(CACHE_DIR, f"{weights_hash(weights)}-{imgsz}-{fmt}{suffix}")
+
+
+def find(weights, imgsz, fmt, dynamic=False):
+    """
+    Returns:
+        str or None: path of the cached artifact, if one exists.
+    """
+    entry = entry_dir(weights, imgsz, fmt, dynamic)
+    if os.path.isdir(entry):
+        names = os.listdir(entry)
+        if names:
+            return os.path.join(entry, names[0])
+    return None
+
+
+def store(artifact, weights, imgsz, fmt, dynamic=False):
+    """
+    Move a finished artifact (file or directory) into the cache.
+    The entry only appears once complete, so an interrupted store is redone.
+
+    Returns:
+        str: cached artifact path.
+    """
+    entry = entry_dir(weights, imgsz, fmt, dynamic)
+    staging = entry + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    name = os.path.basename(str(artifact).rstrip("/\\"))
+    shutil.move(str(artifact), os.path.join(staging, name))
+    os.replace(staging, entry)
+    print(f"[VISION] Cached {fmt} model in {entry}")
+    return os.path.join(entry, name)
+
+
+def remove(weights, imgsz, fmt):
+    """
+    Delete a cache entry, if present.
+    """
+    shutil.rmtree(entry_dir(weights, imgsz, fmt), ignore_errors=True)
+
+
+def export(model, weights, imgsz, fmt, dynamic=False):
+    """
+    Export model to fmt at imgsz and store the artifact in the cache.
+    dynamic: export with variable input shapes (needed for batched inference).
+
+    Returns:
+        str or None: cached artifact path, or None if the export failed.
+    """
+    try:
+        exported = model.export(format=fmt, imgsz=imgsz, dynamic=dynamic, verbose=False)
+        return store(exported, weights, imgsz, fmt, dynamic)
+    except Exception as e:
+        print(f"[VISION] Model export to {fmt} failed: {e}")
+        return None
+
+
+def export_in_background(load_model, weights, imgsz, fmt, dynamic=False):
+    """
+    Load a fresh model with load_model() and export it on a daemon thread,
+    leaving the caller's model free to serve inference meanwhile.
+    """
+    def worker():
+        export(load_model(), weights, imgsz, fmt, dynamic)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
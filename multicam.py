@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Multi-Camera Drone Vision
+Captures from several overhead cameras concurrently, runs one batched YOLO
+call per tick over the newest frame of each, maps detections into the
+shared overlay frame with per-camera homographies and fuses overlaps.
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import rate_control
+import telemetry
+import yolo
+
+# Configuration constants
+FUSE_RADIUS  = 60      # Fixes closer than this (overlay px) are the same drone
+STATS_EVERY  = 5.0     # Seconds between throughput reports
+WINDOW_NAME  = "YOLO Multi-Camera"
+
+
+def default_transform():
+    """
+    Homography reproducing the single-camera mapping in yolo.process_frame:
+    horizontal mirror, scale to output resolution, Y axis pointing up.
+    """
+    scale_x, scale_y = yolo.calculate_scale_factors()
+    return np.array([
+        [-scale_x, 0.0, scale_x * (yolo.PROC_W - 1)],
+        [0.0, -scale_y, yolo.OUT_H],
+        [0.0, 0.0, 1.0],
+    ])
+
+
+def calibrate(image_points, world_points):
+    """
+    Homography from four or more camera pixels to their known positions
+    in overlay coordinates (e.g. floor markers clicked in the GUI).
+    """
+    matrix, _ = cv2.findHomography(
+        np.asarray(image_points, dtype=np.float64),
+        np.asarray(world_points, dtype=np.float64),
+    )
+    return matrix
+
+
+# Camera sources and their pixel → overlay homographies
+CAMERAS = [
+    {"source": yolo.CAM_IDX, "transform": default_transform()},
+]
+
+
+class CameraStream:
+    def __init__(self, source, transform):
+        """
+        Initialize a capture stream.
+        source: cv2.VideoCapture index or URL.
+        transform: 3x3 homography from camera pixels to overlay coordinates.
+        """
+        self.source = source
+        self.transform = np.asarray(transform, dtype=np.float64)
+        self.receiving = False   # Flag to control the capture thread
+        self.thread = None       # Thread object for capturing frames
+        self.frame = None        # Latest frame from the camera
+        self.seq = 0             # Incremented for every new frame
+
+    def start(self):
+        """
+        Launch a background thread that keeps self.frame current.
+        """
+        self.receiving = True
+        self.thread = threading.Thread(target=self._capture_thread, daemon=True)
+        self.thread.start()
+
+    def _capture_thread(self):
+        """
+        Thread target: reads frames as fast as the camera delivers them.
+        """
+        cap = cv2.VideoCapture(self.source)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, yolo.PROC_W)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, yolo.PROC_H)
+        while self.receiving:
+            ret, frame = cap.read()
+            if ret:
+                self.frame = frame
+                self.seq += 1
+            else:
+                time.sleep(0.01)
+        cap.release()
+
+    def stop(self):
+        """
+        Stop capturing and wait for the thread to exit.
+        """
+        self.receiving = False
+        if self.thread:
+            self.thread.join(timeout=1)
+
+
+def to_world(transform, x, y):
+    """
+    Apply a homography to one camera pixel.
+    """
+    wx, wy, w = transform @ (x, y, 1.0)
+    return wx / w, wy / w
+
+
+def detect(result):
+    """
+    Best drone detection in one result as (cx, cy, conf) in camera pixels, or None.
+    """
+    data = result.boxes.data.cpu().numpy()   # x1, y1, x2, y2, conf, cls
+    hits = data[(data[:, 5] == 0) & (data[:, 4] >= yolo.CONF_THR)]
+    if not len(hits):
+        return None
+    x1, y1, x2, y2, conf = hits[hits[:, 4].argmax(), :5]
+    return (x1 + x2) / 2, (y1 + y2) / 2, conf
+
+
+def fuse(fixes):
+    """
+    Fuse per-camera fixes [(x, y, conf), ...] in overlay coordinates.
+    Fixes within FUSE_RADIUS of the most confident one are averaged,
+    weighted by confidence; the rest are treated as false positives.
+
+    Returns:
+        tuple or None: fused (x, y) as ints.
+    """
+    if not fixes:
+        return None
+    pts = np.asarray(fixes, dtype=np.float64)
+    best = pts[pts[:, 2].argmax(), :2]
+    near = pts[np.hypot(*(pts[:, :2] - best).T) <= FUSE_RADIUS]
+    x, y = np.average(near[:, :2], axis=0, weights=near[:, 2])
+    return int(x), int(y)
+
+
+def mosaic(frames):
+    """
+    Tile frames side by side into one OUT_W-wide display image.
+    """
+    width = yolo.OUT_W // len(frames)
+    height = width * yolo.PROC_H // yolo.PROC_W
+    return cv2.hconcat([cv2.resize(f, (width, height)) for f in frames])
+
+
+def main_loop(cameras, model):
+    """
+    Each tick: take the newest unseen frame from every camera, run one
+    batched inference, fuse detections and publish the location.
+    """
+    controller = rate_control.RateController()
+    seen = [0] * len(cameras)
+    frames_done, batches, infer_time = 0, 0, 0.0
+    stats_start = time.perf_counter()
+
+    while True:
+        if not controller.should_infer(time.perf_counter()):
+            time.sleep(0.002)
+            continue
+        ready = [i for i, cam in enumerate(cameras) if cam.seq != seen[i] and cam.frame is not None]
+        if not ready:
+            time.sleep(0.001)
+            continue
+        for i in ready:
+            seen[i] = cameras[i].seq
+        frames = [cameras[i].frame for i in ready]
+
+        t0 = time.perf_counter()
+        results = model(frames, imgsz=yolo.INFER_SIZE, verbose=yolo.DEBUG)
+        elapsed = time.perf_counter() - t0
+        telemetry.publish("inference_ms", elapsed * 1000)
+
+        fixes = []
+        for i, result in zip(ready, results):
+            hit = detect(result)
+            if hit is not None:
+                fixes.append((*to_world(cameras[i].transform, hit[0], hit[1]), hit[2]))
+        yolo.update_location(fuse(fixes))
+        controller.report(t0, time.perf_counter() - t0, yolo.last_location)
+
+        frames_done += len(frames)
+        batches += 1
+        infer_time += elapsed
+        now = time.perf_counter()
+        if now - stats_start >= STATS_EVERY:
+            fps = frames_done / (now - stats_start)
+            telemetry.publish("fps", fps)
+            print(f"[VISION] {len(cameras)} cameras: {fps:.1f} frames/s, "
+                  f"{frames_done / batches:.1f} frames/batch, "
+                  f"{infer_time / batches * 1000:.0f} ms/batch")
+            frames_done, batches, infer_time = 0, 0, 0.0
+            stats_start = now
+
+        if yolo.SHOW_DISPLAY:
+            cv2.imshow(WINDOW_NAME, mosaic([cam.frame for cam in cameras if cam.frame is not None]))
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+
+
+def run():
+    """
+    Entry point: load and warm the model, start every camera stream,
+    then run the batched processing loop.
+    """
+    model = yolo.initialize_model(batched=True)
+    yolo.warm_up(model, batch=len(CAMERAS))
+    cameras = [CameraStream(cam["source"], cam["transform"]) for cam in CAMERAS]
+    for cam in cameras:
+        cam.start()
+    if yolo.SHOW_DISPLAY:
+        cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+
+    try:
+        main_loop(cameras, model)
+    finally:
+        for cam in cameras:
+            cam.stop()
+        cv2.destroyAllWindows()
+        print("[VISION] Multi-camera thread ending.")
+
+
+if __name__ == "__main__":
+    run()
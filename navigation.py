@@ -1,6 +1,6 @@
 # navigation.py
 
-from typing import Callable, Tuple
+from typing import Callable, Optional, Tuple
 
 
 def make_scale_converter(pixel_ref: float, real_cm_ref: float) -> Callable[[float, float], Tuple[float, float]]:
@@ -82,6 +82,27 @@ def calculate_udp(forward: int, sideways: int) -> Tuple[str, str]:
     return forward_cmd, sideways_cmd
 
 
+def limit_command(cmd: str, skip_threshold: int = 5, min_value: int = 20) -> Optional[str]:
+    """
+    Apply Tello movement limits to a '<direction> <value>' command.
+
+    Args:
+        cmd (str): Command string, e.g. 'forward 12'.
+        skip_threshold (int): Values <= this are negligible and dropped.
+        min_value (int): Smallest value the drone accepts; smaller moves are raised to it.
+
+    Returns:
+        Optional[str]: The command to send, or None if the move should be skipped.
+    """
+    direction, value_str = cmd.split()
+    value = int(value_str)
+
+    if value <= skip_threshold:
+        return None
+
+    return f'{direction} {max(value, min_value)}'
+
+
 # Pre-calibrated converter using default reference values (1920 px = 300 cm)
 coord_to_cm = make_scale_converter(pixel_ref=1920, real_cm_ref=300)
 
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+INT8 Detector Builder
+Statically quantizes the ONNX export of the drone detector, using recorded
+frames for calibration. The INT8 model is only activated if it passes an
+accuracy and latency gate against the FP32 model on a held-out replay set.
+Runs offline (python quantize.py); the vision thread only loads the result.
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import model_cache
+import yolo
+
+# Configuration constants
+REPLAY_SOURCE     = "replay"   # Directory of recorded frames or a video file
+MAX_FRAMES        = 400        # Frames read from REPLAY_SOURCE (split calibration / replay)
+MIN_REFERENCE     = 20         # FP32 detections needed on the replay half to judge accuracy
+MIN_RECALL        = 0.95       # INT8 must find the drone in this share of FP32 detections
+MAX_CENTER_ERROR  = 8.0        # Mean center error allowed vs FP32 (processing pixels)
+MIN_SPEEDUP       = 1.2        # INT8 median latency must beat FP32 by this factor
+INT8_FORMAT       = "onnx-int8"
+REJECTED_FORMAT   = "onnx-int8-rejected"  # Cache entry recording a failed gate
+IMAGE_EXTS        = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_frames(source=REPLAY_SOURCE, limit=MAX_FRAMES):
+    """
+    Read up to limit BGR frames from an image directory or a video file.
+    """
+    frames = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(IMAGE_EXTS):
+                frame = cv2.imread(os.path.join(source, name))
+                if frame is not None:
+                    frames.append(frame)
+            if len(frames) >= limit:
+                break
+    elif os.path.isfile(source):
+        cap = cv2.VideoCapture(source)
+        while len(frames) < limit:
+            success, frame = cap.read()
+            if not success:
+                break
+            frames.append(frame)
+        cap.release()
+    return frames
+
+
+def preprocess(frame, imgsz):
+    """
+    Letterbox a BGR frame to imgsz x imgsz the way Ultralytics does and
+    return a 1x3xHxW float32 RGB tensor in [0, 1].
+    """
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    nh, nw = round(h * scale), round(w * scale)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - nh) // 2, (imgsz - nw) // 2
+    canvas[top:top + nh, left:left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1)[None]
+    return np.ascontiguousarray(tensor, dtype=np.float32) / 255.0
+
+
+def quantize(fp32_path, frames, imgsz, out_path):
+    """
+    Write a statically quantized (QDQ, per-channel INT8 weights) copy of
+    fp32_path, calibrated on frames.
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat,
+                                          QuantType, quantize_static)
+
+    input_name = ort.InferenceSession(
+        fp32_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._frames = iter(frames)
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            return None if frame is None else {input_name: preprocess(frame, imgsz)}
+
+    quantize_static(
+        fp32_path, out_path, FrameReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+    )
+    return out_path
+
+
+def timed(model, frame, imgsz):
+    """
+    Returns:
+        (boxes, seconds): one inference and its latency.
+    """
+    t0 = time.perf_counter()
+    boxes = model(frame, imgsz=imgsz, verbose=False)[0].boxes
+    return boxes, time.perf_counter() - t0
+
+
+def compare(reference, candidate, frames, imgsz):
+    """
+    Run both models on frames and measure the candidate against the reference.
+
+    Returns:
+        (recall, center_error, n_reference, speedup): share of reference
+        detections the candidate also found, their mean center distance in
+        pixels, the number of frames where the reference found the drone,
+        and reference / candidate median latency.
+    """
+    for model in (reference, candidate):
+        for _ in range(yolo.WARMUP_FRAMES):
+            model(frames[0], imgsz=imgsz, verbose=False)  # keep setup out of the timings
+
+    found, errors, n_reference = 0, [], 0
+    ref_times, times = [], []
+    for frame in frames:
+        ref_boxes, ref_t = timed(reference, frame, imgsz)
+        boxes, t = timed(candidate, frame, imgsz)
+        ref_times.append(ref_t)
+        times.append(t)
+        ref_box = yolo.find_drone(ref_boxes)
+        if ref_box is None:
+            continue
+        n_reference += 1
+        box = yolo.find_drone(boxes)
+        if box is None:
+            continue
+        found += 1
+        ref_c = np.array([ref_box[0] + ref_box[2], ref_box[1] + ref_box[3]]) / 2
+        c = np.array([box[0] + box[2], box[1] + box[3]]) / 2
+        errors.append(float(np.hypot(*(c - ref_c))))
+    recall = found / n_reference if n_reference else 0.0
+    center_error = float(np.mean(errors)) if errors else float("inf")
+    speedup = float(np.median(ref_times) / np.median(times)) if times else 0.0
+    return recall, center_error, n_reference, speedup
+
+
+def cached_int8(weights, imgsz):
+    """
+    Look up the gated INT8 model without building anything (vision startup path).
+
+    Returns:
+        str or None: model path, or None if it was never built or was rejected.
+    """
+    path = model_cache.find(weights, imgsz, INT8_FORMAT)
+    if path:
+        return path
+    if model_cache.find(weights, imgsz, REJECTED_FORMAT):
+        print("[QUANT] INT8 model was rejected for these weights; run quantize.py to retry.")
+    else:
+        print("[QUANT] No INT8 model built yet; run quantize.py with recorded frames.")
+    return None
+
+
+def reject(weights, imgsz, reason):
+    """
+    Record a failed gate in the cache so later runs do not rebuild.
+    """
+    print(f"[QUANT] INT8 model rejected: {reason}")
+    os.makedirs(model_cache.CACHE_DIR, exist_ok=True)
+    note = os.path.join(model_cache.CACHE_DIR, "rejected.txt")
+    with open(note, "w") as f:
+        f.write(reason + "\n")
+    model_cache.store(note, weights, imgsz, REJECTED_FORMAT)
+
+
+def int8_model(weights, imgsz, source=REPLAY_SOURCE):
+    """
+    Return the path of a gated INT8 ONNX model for weights at imgsz,
+    building and checking it if neither an accepted model nor a recorded
+    rejection exists. Returns None when no model passes the gate, so the
+    caller can keep using FP32. Slow: call offline, not from the vision thread.
+    """
+    cached = model_cache.find(weights, imgsz, INT8_FORMAT)
+    if cached:
+        return cached  # Only models that passed the gate are cached
+    if model_cache.find(weights, imgsz, REJECTED_FORMAT):
+        return None
+
+    from ultralytics import YOLO
+
+    frames = load_frames(source)
+    # Contiguous halves: neighbouring frames are near-duplicates, so interleaving would leak calibration into replay
+    half = len(frames) // 2
+    calibration, replay = frames[:half], frames[half:]
+    if not calibration:
+        print(f"[QUANT] No recorded frames in {source}; staying on FP32.")
+        return None
+
+    fp32_path = model_cache.find(weights, imgsz, "onnx")
+    if fp32_path is None:
+        fp32_path = model_cache.export(YOLO(weights), weights, imgsz, "onnx")
+    if fp32_path is None:
+        return None
+
+    print(f"[QUANT] Calibrating INT8 model on {len(calibration)} frames...")
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    staging = os.path.join(model_cache.CACHE_DIR, f"{stem}_int8.onnx")
+    try:
+        quantize(fp32_path, calibration, imgsz, staging)
+    except Exception as e:
+        print(f"[QUANT] Quantization failed: {e}")
+        return None
+
+    if not replay:
+        print("[QUANT] No replay frames to check the INT8 model; staying on FP32.")
+        os.remove(staging)
+        return None
+    recall, center_error, n_reference, speedup = compare(
+        YOLO(fp32_path, task="detect"), YOLO(staging, task="detect"), replay, imgsz
+    )
+    print(f"[QUANT] Replay: {n_reference} FP32 detections, recall={recall:.3f}, "
+          f"center error={center_error:.1f} px, speedup={speedup:.2f}x")
+    if n_reference < MIN_REFERENCE:
+        # Not enough evidence either way: do not record a rejection
+        print(f"[QUANT] Need >= {MIN_REFERENCE} FP32 detections to judge the INT8 model; staying on FP32.")
+        os.remove(staging)
+        return None
+    if recall < MIN_RECALL or center_error > MAX_CENTER_ERROR or speedup < MIN_SPEEDUP:
+        os.remove(staging)
+        reject(weights, imgsz, f"recall={recall:.3f} (>= {MIN_RECALL}), "
+                               f"center error={center_error:.1f} px (<= {MAX_CENTER_ERROR}), "
+                               f"speedup={speedup:.2f}x (>= {MIN_SPEEDUP})")
+        return None
+
+    print("[QUANT] INT8 model accepted.")
+    return model_cache.store(staging, weights, imgsz, INT8_FORMAT)
+
+
+if __name__ == "__main__":
+    # Rebuild and re-gate the INT8 model from the given replay source
+    model_cache.remove(yolo.WEIGHTS, yolo.INFER_SIZE, INT8_FORMAT)
+    model_cache.remove(yolo.WEIGHTS, yolo.INFER_SIZE, REJECTED_FORMAT)
+    path = int8_model(yolo.WEIGHTS, yolo.INFER_SIZE, sys.argv[1] if len(sys.argv) > 1 else REPLAY_SOURCE)
+    sys.exit(0 if path else 1)
@@ -0,0 +1,77 @@
+# rate_control.py
+"""
+Adaptive Inference Rate
+Decides how often the vision loop runs the detector, from the mission
+phase reported by udp_logic, observed drone motion and a CPU budget.
+"""
+
+import math
+
+# Detection rate per mission phase (Hz)
+RATES = {
+    "idle":     2.0,   # No mission: keep the HUD position roughly current
+    "hover":    5.0,   # Mission active, no move in progress
+    "moving":  15.0,   # SDK move in flight
+    "approach": 30.0,  # Position about to be read for a navigation decision
+}
+CPU_BUDGET    = 0.6    # Max share of wall time spent processing frames
+MOTION_PX     = 15     # Fix-to-fix movement (overlay px) that counts as moving
+MOTION_HOLD   = 1.0    # Seconds to keep at least the moving rate after motion
+LATENCY_ALPHA = 0.2    # Smoothing factor for measured processing time
+
+phase = "idle"  # Current mission phase, set by udp_logic
+
+
+def set_phase(name):
+    """
+    Report the mission phase (one of RATES) from the control thread.
+    """
+    global phase
+    phase = name
+
+
+class RateController:
+    def __init__(self):
+        """
+        Track processing cost and motion to schedule the next inference.
+        """
+        self.next_at = 0.0        # Earliest time for the next inference
+        self.process_s = 0.0      # Smoothed per-frame processing time
+        self.last_fix = None      # Last reported drone location
+        self.moving_until = 0.0   # Motion seen: hold the moving rate until then
+
+    def target_hz(self, now):
+        """
+        Desired detection rate for the current phase and observed motion.
+        """
+        hz = RATES.get(phase, RATES["idle"])
+        if now < self.moving_until:
+            hz = max(hz, RATES["moving"])
+        return hz
+
+    def should_infer(self, now):
+        """
+        True when a frame captured at now should go through the detector.
+        """
+        return now >= self.next_at
+
+    def report(self, started, elapsed, location):
+        """
+        Record one processed frame (start time, processing seconds, drone
+        location afterwards) and schedule the next one. The interval never
+        drops below elapsed / CPU_BUDGET, so processing stays in budget.
+        """
+        if self.process_s:
+            self.process_s += LATENCY_ALPHA * (elapsed - self.process_s)
+        else:
+            self.process_s = elapsed
+
+        if location and self.last_fix:
+            moved = math.hypot(location[0] - self.last_fix[0], location[1] - self.last_fix[1])
+            if moved > MOTION_PX:
+                self.moving_until = started + MOTION_HOLD
+        if location:
+            self.last_fix = location
+
+        interval = max(1.0 / self.target_hz(started), self.process_s / CPU_BUDGET)
+        self.next_at = started + interval
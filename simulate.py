@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Mission Simulator
+Runs udp_logic's own waypoint loop (retry_to_reach and everything below
+it, including geofence holds and udp_sender's timeout handling) against a
+kinematic drone with noisy, delayed vision fixes, in simulated time.
+Sweeps a grid of navigation tunables over randomized missions on a
+process pool and reports the fastest settings that still reach waypoints.
+"""
+
+import bisect
+import contextlib
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import geofence
+import link_monitor as LINK
+import mission
+import udp_logic
+import udp_sender as UDP
+
+# Drone and link model
+RTT            = (0.03, 0.12)   # Network round trip range (s)
+REPLY_LOSS     = 0.01           # Share of replies lost on the link
+SETTLE_TIME    = 1.0            # Acceleration and settling per move (s)
+MOVE_ERROR     = 0.08           # Relative error of the flown distance (1 sigma)
+DRIFT_PX       = 6.0            # Sideways drift per move (overlay px, 1 sigma)
+VISION_HZ      = 15.0           # Fix rate while moving (rate_control "moving")
+VISION_LATENCY = 0.12           # Capture-to-fix delay (s)
+VISION_NOISE   = 4.0            # Fix noise (overlay px, 1 sigma)
+VISION_DROPOUT = 0.05           # Share of frames without a detection
+
+# Missions
+WAYPOINTS      = (3, 6)         # Waypoints per random mission (inclusive range)
+GOAL_X_TOL     = 128            # Ground-truth tolerance for a reached waypoint (px):
+GOAL_Y_TOL     = 72             # judged on the true position, not the tuned one
+MISSIONS       = 200            # Random missions per setting
+MIN_SUCCESS    = 0.95           # Share of waypoints a setting must reach to qualify
+
+# Parameter grid swept by default
+GRID = {
+    "delay":          [0.05, 0.1, 0.3, 0.5],
+    "skip_threshold": [3, 5, 10],
+    "min_value":      [20, 30],
+    "tolerance":      [(64, 36), (96, 54), (128, 72), (160, 90)],
+    "max_retries":    [2, 3, 5],
+}
+
+MOVES = ("forward", "back", "left", "right")
+
+
+def current_settings():
+    """
+    The tunables udp_logic flies with today.
+    """
+    return {
+        "delay": udp_logic.DELAY,
+        "skip_threshold": udp_logic.SKIP_THRESHOLD,
+        "min_value": udp_logic.MIN_VALUE,
+        "tolerance": (udp_logic.ARRIVE_X_TOL, udp_logic.ARRIVE_Y_TOL),
+        "max_retries": udp_logic.MAX_RETRIES,
+    }
+
+
+def random_mission(rng):
+    """
+    Random start position and waypoint list that pass mission.validate.
+    """
+    m = mission.MIN_EDGE_MARGIN
+    point = lambda: (rng.uniform(m, mission.VIRTUAL_WIDTH - m), rng.uniform(m, mission.VIRTUAL_HEIGHT - m))
+    start = point()
+    count = rng.randint(*WAYPOINTS)
+    waypoints = []
+    while len(waypoints) < count:
+        p = point()
+        if mission.check_next(waypoints, p) == mission.OK:
+            waypoints.append(p)
+    return start, waypoints
+
+
+class SimDrone:
+    def __init__(self, start, rng):
+        """
+        Kinematic drone: straight-line moves at link_monitor's assumed speeds
+        plus SETTLE_TIME, observed through a latent, noisy, lossy vision fix.
+        """
+        self.rng = rng
+        self.t = 0.0
+        self.times = [0.0]              # Trajectory knots: the drone moves linearly between them
+        self.points = [start]
+        self.frame = -1                 # Index of the last vision frame evaluated
+        self.fix = None                 # Latest vision fix
+
+    def position(self, t):
+        """
+        True position at time t.
+        """
+        i = bisect.bisect_right(self.times, t) - 1
+        if i < 0:
+            return self.points[0]
+        if i + 1 >= len(self.times):
+            return self.points[-1]
+        t0, t1 = self.times[i], self.times[i + 1]
+        (x0, y0), (x1, y1) = self.points[i], self.points[i + 1]
+        a = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+        return x0 + (x1 - x0) * a, y0 + (y1 - y0) * a
+
+    def update_vision(self):
+        """
+        Publish the newest detected frame, captured VISION_LATENCY earlier,
+        the way yolo.update_location does.
+        """
+        newest = int((self.t - VISION_LATENCY) * VISION_HZ)
+        for frame in range(max(self.frame + 1, newest - 2), newest + 1):
+            if self.rng.random() >= VISION_DROPOUT:
+                x, y = self.position(frame / VISION_HZ)
+                self.fix = (int(x + self.rng.gauss(0, VISION_NOISE)),
+                            int(y + self.rng.gauss(0, VISION_NOISE)))
+                geofence.on_fix(self.fix)
+        self.frame = max(self.frame, newest)
+        if self.fix is not None:
+            udp_logic.drone_location = self.fix
+
+    def sleep(self, seconds):
+        """
+        Stand-in for udp_logic.sleep: advance simulated time.
+        """
+        self.t += seconds
+        self.update_vision()
+
+    def exchange(self, cmd, timeout):
+        """
+        Stand-in for udp_sender._exchange: carry out cmd and return the reply,
+        or '(timeout)' if it is lost or later than timeout. A move whose reply
+        is lost is still flown.
+        """
+        parts = cmd.split()
+        if parts[0] in MOVES:
+            d = int(parts[1]) * geofence.PX_PER_CM * (1 + self.rng.gauss(0, MOVE_ERROR))
+            drift = self.rng.gauss(0, DRIFT_PX)
+            dx, dy = {"forward": (d, drift), "back": (-d, drift),
+                      "right": (drift, -d), "left": (drift, d)}[parts[0]]
+            rtt = self.rng.uniform(*RTT)
+            x, y = self.position(self.t)
+            begin = self.t + rtt / 2
+            end = begin + LINK.motion_time(cmd) + SETTLE_TIME
+            self.times += [begin, end]
+            self.points += [(x, y), (x + dx, y + dy)]
+            elapsed = end + rtt / 2 - self.t
+        else:
+            elapsed = self.rng.uniform(*RTT)
+        lost = self.rng.random() < REPLY_LOSS
+        if lost or elapsed > timeout:
+            LINK.record(cmd, None)
+            self.sleep(timeout)
+            return "(timeout)"
+        LINK.record(cmd, elapsed)
+        self.sleep(elapsed)
+        return "87" if cmd == "battery?" else "ok"
+
+
+def fly(p, seed):
+    """
+    Fly one random mission with settings p through udp_logic.retry_to_reach,
+    with the simulated drone as sender and clock.
+
+    Returns:
+        (seconds, waypoints reached on the true position, waypoints)
+    """
+    rng = random.Random(seed)
+    start, waypoints = random_mission(rng)
+    drone = SimDrone(start, rng)
+    udp_logic.drone_location = None
+    udp_logic.sleep = drone.sleep
+    UDP.exchange = drone.exchange
+    geofence.reset()
+    drone.sleep(VISION_LATENCY + 1 / VISION_HZ)  # first fix, as in wait_for_vision_fix
+    reached = 0
+    for dest in waypoints:  # udp_logic.execute_mission without the HUD updates
+        if geofence.breached():
+            break
+        udp_logic.retry_to_reach(dest)
+        x, y = drone.position(drone.t)
+        reached += abs(x - dest[0]) <= GOAL_X_TOL and abs(y - dest[1]) <= GOAL_Y_TOL
+    return drone.t, reached, len(waypoints)
+
+
+def apply(p):
+    """
+    Set udp_logic's tunables to the settings p.
+    """
+    udp_logic.DELAY = p["delay"]
+    udp_logic.SKIP_THRESHOLD = p["skip_threshold"]
+    udp_logic.MIN_VALUE = p["min_value"]
+    udp_logic.ARRIVE_X_TOL, udp_logic.ARRIVE_Y_TOL = p["tolerance"]
+    udp_logic.MAX_RETRIES = p["max_retries"]
+
+
+def evaluate(p, missions=MISSIONS, seed=0):
+    """
+    Fly the same missions (common random numbers) with settings p.
+    udp_logic's console output is discarded meanwhile.
+
+    Returns:
+        dict: settings plus mean mission time and waypoint success rate.
+    """
+    saved = current_settings(), udp_logic.sleep, UDP.exchange
+    total_time, reached, total = 0.0, 0, 0
+    apply(p)
+    try:
+        with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            for i in range(missions):
+                t, r, n = fly(p, seed + i)
+                total_time += t
+                reached += r
+                total += n
+    finally:
+        apply(saved[0])
+        udp_logic.sleep, UDP.exchange = saved[1], saved[2]
+    return {**p, "time": total_time / missions, "success": reached / total}
+
+
+def grid_settings(grid=GRID):
+    """
+    Every combination of the grid's values, as settings dicts.
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def sweep(grid=GRID, missions=MISSIONS, workers=None):
+    """
+    Evaluate every grid setting on a process pool.
+
+    Returns:
+        list of evaluate() results, fastest qualifying settings first.
+    """
+    settings = grid_settings(grid)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(evaluate, settings, itertools.repeat(missions), chunksize=4))
+    return sorted(results, key=lambda r: (r["success"] < MIN_SUCCESS, r["time"], -r["success"]))
+
+
+def describe(r):
+    return (f"DELAY={r['delay']} SKIP_THRESHOLD={r['skip_threshold']} MIN_VALUE={r['min_value']} "
+            f"ARRIVE_X_TOL/Y_TOL={r['tolerance'][0]}/{r['tolerance'][1]} MAX_RETRIES={r['max_retries']}: "
+            f"{r['time']:.1f} s/mission, {r['success']:.1%} waypoints reached")
+
+
+def run(missions=MISSIONS, workers=None, top=5):
+    """
+    Entry point: sweep GRID, compare with the current udp_logic settings
+    and print the best ones.
+    """
+    t0 = time.perf_counter()
+    results = sweep(GRID, missions, workers)
+    baseline = evaluate(current_settings(), missions)
+    elapsed = time.perf_counter() - t0
+    flown = (len(results) + 1) * missions
+    print(f"[SIM] {flown} missions in {elapsed:.1f} s ({flown / elapsed * 60:.0f}/min)")
+    print(f"[SIM] Current:  {describe(baseline)}")
+    for rank, r in enumerate(results[:top], start=1):
+        print(f"[SIM] Best #{rank}: {describe(r)}")
+    if results[0]["success"] < MIN_SUCCESS:
+        print(f"[SIM] No setting reached {MIN_SUCCESS:.0%} of waypoints.")
+    return results
+
+
+if __name__ == "__main__":
+    # Optional arguments: missions per setting, worker processes
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
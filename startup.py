@@ -0,0 +1,48 @@
+# startup.py
+"""
+Startup Timing
+Records import and readiness milestones relative to process start
+and prints a breakdown, so slow startup stages are easy to spot.
+"""
+
+import importlib
+import threading
+import time
+
+T0 = time.perf_counter()  # Reference point: first import of this module
+
+_marks = []               # (milestone, seconds since T0, seconds it took)
+_lock = threading.Lock()
+
+
+def mark(name, took=None):
+    """
+    Record a milestone reached now (optionally with its own duration).
+    """
+    elapsed = time.perf_counter() - T0
+    with _lock:
+        _marks.append((name, elapsed, took))
+    detail = f" ({took * 1000:.0f} ms)" if took is not None else ""
+    print(f"[STARTUP] {name} at {elapsed * 1000:.0f} ms{detail}")
+
+
+def timed_import(name):
+    """
+    Import a module by name, recording how long the import took.
+    """
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    mark(f"import {name}", time.perf_counter() - t0)
+    return module
+
+
+def report():
+    """
+    Print every milestone recorded so far, in time order.
+    """
+    with _lock:
+        marks = sorted(_marks, key=lambda m: m[1])
+    print("[STARTUP] ─── Startup breakdown ───")
+    for name, elapsed, took in marks:
+        detail = f"{took * 1000:8.0f} ms" if took is not None else " " * 11
+        print(f"[STARTUP] {elapsed * 1000:8.0f} ms  {detail}  {name}")
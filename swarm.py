@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Swarm Controller
+Flies several Tello drones (station mode, one IP each) from a single
+selector-driven event loop: one UDP socket per drone, no thread per drone.
+Missions start together once every drone has taken off, and each leg
+waits until its path is clear of the other drones.
+"""
+
+import selectors
+import socket
+import sys
+import time
+from collections import deque
+
+import link_monitor as LINK
+import mission
+import navigation as NAV
+
+# Configuration constants
+TELLO_PORT     = 8889     # SDK command port on every drone
+NET_TIMEOUT    = 3.0      # Reply timeout for queries (s)
+MAX_RETRIES    = 3        # Sends per command before the drone is failed
+STALE_GRACE    = 1.0      # Replies discarded after a resent query completes (s)
+TICK           = 0.02     # Longest the loop waits for replies (s)
+BASE_ALTITUDE  = 100      # Climb after takeoff for the first drone (cm)
+ALT_STEP       = 40       # Extra climb per drone, for vertical separation (cm)
+SEPARATION_CM  = 60       # Horizontal clearance required between drones (cm)
+HOLD_TIMEOUT   = 10.0     # Longest a leg waits for clearance before relying on altitude (s)
+
+# Station-mode drones: (name, IP, mission file)
+DRONES = [
+    ("tello-1", "192.168.1.11", "missions/tello-1.mission"),
+    ("tello-2", "192.168.1.12", "missions/tello-2.mission"),
+]
+
+
+def region(points, margin):
+    """
+    Axis-aligned box (cm) around pixel points, grown by margin on every side.
+    """
+    cm = [NAV.coord_to_cm(*p) for p in points]
+    xs, ys = [p[0] for p in cm], [p[1] for p in cm]
+    return min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin
+
+
+def overlaps(a, b):
+    """
+    True if two boxes from region() intersect.
+    """
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class Drone:
+    def __init__(self, name, ip, waypoints, altitude):
+        """
+        One drone's command endpoint and mission state.
+        waypoints: mission in overlay pixels; the drone starts under the first.
+        """
+        self.name = name
+        self.address = (ip, TELLO_PORT)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("", 0))              # Own ephemeral port: replies route to this socket
+        self.sock.setblocking(False)
+
+        self.waypoints = [tuple(p) for p in waypoints]
+        self.leg = 0                         # Index of the waypoint the drone is at
+        self.phase = "preflight"             # preflight, ready, holding, moving, landing, done,
+                                             # aborting (landing after a failure), failed
+        self.queue = deque(["command", "takeoff", f"up {altitude}"])
+        self.pending = None                  # (cmd, sent_at, deadline, attempt)
+        self.attempt = 1                     # Attempt number of the next send of the queue head
+        self.quiet_until = 0.0               # Late replies to resent queries are dropped until then
+        self.hold_since = None               # When the current leg started waiting
+        self.aborted_leg = False             # Failed mid-leg: may be anywhere along it
+        self.last_sent = 0.0                 # When the last command went out
+
+        # Statistics
+        self.sent = 0
+        self.timeouts = 0
+        self.rtts = []                       # (cmd, seconds) per reply
+        self.started = None
+        self.finished = None
+
+    def occupied(self):
+        """
+        Region the drone may be in right now: its current leg while moving
+        (or if it failed during one), otherwise its current waypoint.
+        """
+        points = [self.waypoints[self.leg]]
+        if (self.phase == "moving" or self.aborted_leg) and self.leg + 1 < len(self.waypoints):
+            points.append(self.waypoints[self.leg + 1])
+        return region(points, SEPARATION_CM / 2)
+
+    def next_leg(self):
+        """
+        Returns:
+            tuple or None: (start, end) pixels of the next leg.
+        """
+        if self.leg + 1 < len(self.waypoints):
+            return self.waypoints[self.leg], self.waypoints[self.leg + 1]
+        return None
+
+    def start_leg(self):
+        """
+        Queue the commands for the next leg.
+        """
+        start, end = self.next_leg()
+        for cmd in NAV.calculate_from_pixels(start, end):
+            cmd = NAV.limit_command(cmd)
+            if cmd:
+                self.queue.append(cmd)
+        self.hold_since = None
+        if self.queue:
+            self.phase = "moving"
+        else:
+            self.leg += 1  # leg too short to fly: already there
+
+    def land(self):
+        """
+        Queue the landing command.
+        """
+        self.queue.append("land")
+        self.phase = "landing"
+
+    def send_next(self, now):
+        """
+        Send the head of the queue if nothing is in flight.
+        """
+        if self.pending is not None or not self.queue or now < self.quiet_until:
+            return
+        cmd = self.queue[0]
+        try:
+            self.sock.sendto(cmd.encode("utf-8"), self.address)
+        except OSError as e:
+            print(f"[SWARM] {self.name}: send '{cmd}' failed → {e}")
+        self.sent += 1
+        self.last_sent = now
+        self.pending = (cmd, now, now + LINK.timeout_for(cmd) if LINK.is_motion(cmd) else now + NET_TIMEOUT,
+                        self.attempt)
+
+    def check_timeout(self, now):
+        """
+        Resend a query or land whose reply is overdue; fail the drone on an
+        overdue move, which is never resent (the drone may be flying it already).
+        """
+        if self.pending is None or now < self.pending[2]:
+            return
+        cmd, _, _, attempt = self.pending
+        self.timeouts += 1
+        self.pending = None
+        if LINK.is_motion(cmd) and cmd != "land":  # landing twice is harmless
+            self.fail(now, f"no reply to '{cmd}'")
+        elif attempt < MAX_RETRIES:
+            print(f"[SWARM] {self.name}: timeout #{attempt} for '{cmd}', retrying")
+            self.attempt = attempt + 1
+            self.send_next(now)
+        else:
+            self.fail(now, f"'{cmd}' unanswered after {MAX_RETRIES} attempts")
+
+    def fail(self, now, reason):
+        """
+        Abandon the mission and queue a landing, sent and retried like any
+        other command. If the landing itself fails, give up: the drone stays
+        an obstacle to the others.
+        """
+        self.pending = None
+        self.queue.clear()
+        self.attempt = 1
+        if self.phase == "aborting":
+            print(f"[SWARM] {self.name}: {reason}; landing not confirmed")
+            self.phase = "failed"
+            self.finished = now
+            return
+        print(f"[SWARM] {self.name}: {reason}; landing")
+        self.aborted_leg = self.phase == "moving"
+        self.quiet_until = now + STALE_GRACE  # drop a late reply to the abandoned command
+        self.queue.append("land")
+        self.phase = "aborting"
+
+    def on_reply(self, text, now):
+        """
+        Handle one reply: complete the pending command and advance the phase.
+        """
+        if self.pending is None or now < self.quiet_until:
+            return  # late reply to a command that already timed out
+        cmd, sent_at, _, attempt = self.pending
+        self.pending = None
+        self.rtts.append((cmd, now - sent_at))
+        if attempt > 1:
+            self.quiet_until = now + STALE_GRACE  # let replies to earlier attempts arrive and drop them
+        if text.startswith("error"):
+            # The drone rejected the command, so it did not act on it: safe to resend
+            if attempt < MAX_RETRIES:
+                print(f"[SWARM] {self.name}: '{cmd}' → {text}, retrying")
+                self.attempt = attempt + 1  # resent by the event loop
+            else:
+                self.fail(now, f"'{cmd}' → {text} after {MAX_RETRIES} attempts")
+            return
+        self.queue.popleft()
+        self.attempt = 1
+        if self.queue:
+            return
+
+        if self.phase == "preflight":
+            self.phase = "ready"
+        elif self.phase == "moving":
+            self.leg += 1
+            self.phase = "holding"
+        elif self.phase == "landing":
+            self.phase = "done"
+            self.finished = now
+        elif self.phase == "aborting":
+            self.phase = "failed"
+            self.finished = now
+
+    def report(self):
+        """
+        Print throughput and latency for this drone.
+        """
+        duration = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        queries = sorted(rtt for cmd, rtt in self.rtts if LINK.motion_time(cmd) == 0.0)
+        p50 = queries[len(queries) // 2] * 1000 if queries else float("nan")
+        p90 = queries[min(len(queries) - 1, int(len(queries) * 0.9))] * 1000 if queries else float("nan")
+        rate = len(self.rtts) / duration if duration > 0 else 0.0
+        print(f"[SWARM] {self.name}: {self.phase}, {self.leg + 1}/{len(self.waypoints)} waypoints, "
+              f"{duration:.1f} s, {self.sent} sent, {len(self.rtts)} replies ({rate:.2f}/s), "
+              f"{self.timeouts} timeouts, query RTT p50={p50:.0f} ms p90={p90:.0f} ms")
+
+
+class Swarm:
+    def __init__(self, drones):
+        """
+        drones: list of Drone; all sockets share one selector.
+        """
+        self.drones = drones
+        self.selector = selectors.DefaultSelector()
+        for drone in drones:
+            self.selector.register(drone.sock, selectors.EVENT_READ, drone)
+        self.released = False                # Synchronized mission start happened
+
+    def clear_for(self, drone, moving_only=False):
+        """
+        True if drone's next leg stays SEPARATION_CM away from every other
+        airborne drone's occupied region (only drones in motion if moving_only).
+        Failed drones count as airborne: their landing may not have happened.
+        """
+        path = region(drone.next_leg(), SEPARATION_CM / 2)
+        phases = (("moving", "aborting") if moving_only else
+                  ("preflight", "ready", "holding", "moving", "landing", "aborting", "failed"))
+        return not any(
+            overlaps(path, other.occupied())
+            for other in self.drones
+            if other is not drone and other.phase in phases
+        )
+
+    def schedule(self, now):
+        """
+        Keep hovering drones alive, release the mission once all drones are
+        airborne, then start legs whose paths are clear and land drones
+        that have finished.
+        """
+        for drone in self.drones:
+            # Hovering drones auto-land after ~15 s without commands
+            if (drone.phase in ("ready", "holding") and drone.pending is None and not drone.queue
+                    and now - drone.last_sent > LINK.KEEPALIVE_IDLE):
+                drone.queue.append(LINK.KEEPALIVE_CMD)
+
+        if not self.released:
+            if all(d.phase in ("ready", "failed") for d in self.drones):
+                self.released = True
+                print("[SWARM] All drones airborne: starting missions.")
+                for drone in self.drones:
+                    if drone.phase == "ready":
+                        drone.phase = "holding"
+                        drone.started = now
+            return
+
+        for drone in self.drones:
+            if drone.phase != "holding" or drone.queue or drone.pending:
+                continue  # busy (moving, landing or a keepalive in flight)
+            if drone.next_leg() is None:
+                drone.land()
+            elif self.clear_for(drone):
+                drone.start_leg()
+            elif drone.hold_since is None:
+                drone.hold_since = now
+            elif now - drone.hold_since > HOLD_TIMEOUT and self.clear_for(drone, moving_only=True):
+                # Only hovering drones block: break the standoff one drone at a time
+                print(f"[SWARM] {drone.name}: path blocked for {HOLD_TIMEOUT:.0f} s; "
+                      f"proceeding on altitude separation")
+                drone.start_leg()
+
+    def run(self):
+        """
+        Event loop: schedule, send, wait for replies, until every drone
+        has landed or failed.
+        """
+        t0 = time.perf_counter()
+        for drone in self.drones:
+            drone.started = t0
+        while any(d.phase not in ("done", "failed") for d in self.drones):
+            now = time.perf_counter()
+            self.schedule(now)
+            for drone in self.drones:
+                drone.check_timeout(now)
+                drone.send_next(now)
+
+            for key, _ in self.selector.select(timeout=TICK):
+                drone = key.data
+                try:
+                    data, _ = drone.sock.recvfrom(1024)
+                except OSError:
+                    continue
+                drone.on_reply(data.decode("utf-8", errors="ignore").strip(), time.perf_counter())
+
+        total = sum(len(d.rtts) for d in self.drones)
+        elapsed = time.perf_counter() - t0
+        print(f"[SWARM] Finished in {elapsed:.1f} s, {total} replies ({total / elapsed:.2f}/s overall)")
+        for drone in self.drones:
+            drone.report()
+
+    def close(self):
+        """
+        Unregister and close every drone socket.
+        """
+        for drone in self.drones:
+            self.selector.unregister(drone.sock)
+            drone.sock.close()
+        self.selector.close()
+
+
+def run(drones=DRONES):
+    """
+    Entry point: load and validate each drone's mission, then fly them all.
+    """
+    fleet = []
+    for i, (name, ip, path) in enumerate(drones):
+        points = mission.load(path)
+        if not len(points) or not mission.report(points):
+            print(f"[SWARM] {name}: mission {path} rejected.")
+            return False
+        fleet.append(Drone(name, ip, points, BASE_ALTITUDE + i * ALT_STEP))
+
+    swarm = Swarm(fleet)
+    try:
+        swarm.run()
+    finally:
+        swarm.close()
+    return all(d.phase == "done" for d in fleet)
+
+
+if __name__ == "__main__":
+    # Optional arguments: IP=MISSION_FILE pairs, overriding DRONES
+    args = sys.argv[1:]
+    if args:
+        drones = [(f"tello-{i + 1}", *arg.split("=", 1)) for i, arg in enumerate(args)]
+        sys.exit(0 if run(drones) else 1)
+    sys.exit(0 if run() else 1)
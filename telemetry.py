@@ -0,0 +1,44 @@
+# telemetry.py
+"""
+Telemetry Bus
+Non-blocking hand-off of live values (position, latencies, battery,
+mission progress) from worker threads to the Tk overlay.
+"""
+
+import queue
+
+MAX_PENDING = 1000  # Updates buffered between GUI ticks
+
+_queue = queue.Queue(maxsize=MAX_PENDING)
+
+
+def publish(key, value):
+    """
+    Queue a (key, value) update from any thread. Never blocks: if the GUI
+    has fallen behind, the oldest pending update is discarded.
+    """
+    while True:
+        try:
+            _queue.put_nowait((key, value))
+            return
+        except queue.Full:
+            try:
+                _queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+def drain():
+    """
+    Take every pending update without blocking.
+
+    Returns:
+        dict: latest value per key; bursts of the same key are coalesced.
+    """
+    latest = {}
+    while True:
+        try:
+            key, value = _queue.get_nowait()
+        except queue.Empty:
+            return latest
+        latest[key] = value
@@ -1,9 +1,22 @@
-import navigation as NAV, udp_sender as UDP, time, gui, threading  # import modules for nav logic, UDP comms, timing, and GUI
-from drone_feed import run as drone_feed_run  # import camera feed module
+import navigation as NAV, udp_sender as UDP, time, mission, threading  # import modules for nav logic, UDP comms, timing, and mission model
+import flight_log as FLOG  # mission flight recorder
+import telemetry  # live values for the GUI HUD
+import rate_control  # tells the vision loop how fresh positions must be
+import drone_ap_connect as AP  # drone Wi-Fi link state
+import geofence  # flight area and no-fly zones
 
 drone_location = None  # global updated by vision thread with current (x, y) position
 
 DELAY = 0.1  # seconds to wait between successive UDP commands
+SKIP_THRESHOLD = 5  # moves of this many cm or less are skipped
+MIN_VALUE = 20  # smallest move the drone accepts (cm); shorter moves are raised to it
+ARRIVE_X_TOL = 128  # horizontal tolerance (px) for a waypoint to count as reached
+ARRIVE_Y_TOL = 72  # vertical tolerance (px) for a waypoint to count as reached
+MAX_RETRIES = 3  # approach attempts per waypoint
+SHOW_FEED = True  # start the drone camera feed window after 'streamon'
+LINK_TIMEOUT = 30  # seconds to wait for a dropped Wi-Fi link before sending anyway
+link_generation = 0  # AP connection the UDP socket was opened on
+sleep = time.sleep  # pacing clock; simulate.py swaps in simulated time
 
 '''Check if current position is within given tolerances of target.'''
 def is_close_enough(current, target, x_tol=100, y_tol=50):
@@ -25,27 +38,35 @@ def is_close_enough(current, target, x_tol=100, y_tol=50):
     return dx <= x_tol and dy <= y_tol  # within both tolerances
 
 '''Send a Tello UDP command if its value exceeds thresholds.'''
-def send_command_if_needed(cmd, skip_threshold=5, min_value=20):
+def send_command_if_needed(cmd, skip_threshold=None, min_value=None):
     """
     Args:
         cmd (str): Command string in format '<direction> <value>'
-        skip_threshold (int): Values <= this are ignored
-        min_value (int): Smallest value to send if above skip_threshold
+        skip_threshold (int): Values <= this are ignored (default SKIP_THRESHOLD)
+        min_value (int): Smallest value to send if above skip_threshold (default MIN_VALUE)
     """
-    direction, value_str = cmd.split()  # split into action and amount
-    value = int(value_str)  # convert amount to integer
-
-    if value <= skip_threshold:
+    skip_threshold = SKIP_THRESHOLD if skip_threshold is None else skip_threshold
+    min_value = MIN_VALUE if min_value is None else min_value
+    cmd_to_send = NAV.limit_command(cmd, skip_threshold, min_value)  # enforce movement limits
+    if cmd_to_send is None:
         print(f"Skipping small movement: {cmd}")  # ignore negligible adjustments
         return
 
-    if value < min_value:
-        value = min_value  # enforce minimum movement
-    cmd_to_send = f"{direction} {value}"  # reconstruct command
+    if geofence.breached():
+        print(f"[UDP] Geofence breached; not sending {cmd_to_send}")  # landing instead
+        return
+    level = geofence.check_commands(drone_location, [cmd_to_send])  # where this move ends up
+    if level != geofence.CLEAR:
+        print(f"[UDP] Holding: {cmd_to_send} would end {geofence.LEVEL_NAMES[level]}")  # hover in place
+        FLOG.record(FLOG.STATE, text="fence hold", value=float(level))
+        return
 
+    ensure_link()  # ride out Wi-Fi drops mid-mission
     print(f"[UDP] Sending: {cmd_to_send}")  # debug output
+    rate_control.set_phase("moving")  # drone in motion until the reply
     UDP.send_command(cmd_to_send)  # transmit over UDP
-    time.sleep(DELAY)  # enforce pacing between commands
+    rate_control.set_phase("approach")  # next position read decides the next move
+    sleep(DELAY)  # enforce pacing between commands
 
 '''Calculate and send moves to approach a single waypoint.'''
 def move_to_destination(dest):
@@ -55,7 +76,7 @@ def move_to_destination(dest):
     Returns:
         bool: True if destination reached, else False
     """
-    time.sleep(DELAY)  # brief pause before computing
+    sleep(DELAY)  # brief pause before computing
 
     loc = drone_location  # read latest position
     if loc is None:
@@ -75,34 +96,54 @@ def move_to_destination(dest):
 
     # Step 3: verify if within tolerance
     final_loc = drone_location  # final position after moves
-    reached = is_close_enough(final_loc, dest, x_tol=128, y_tol=72)  # check arrival
+    reached = is_close_enough(final_loc, dest, x_tol=ARRIVE_X_TOL, y_tol=ARRIVE_Y_TOL)  # check arrival
     print(f"[UDP] Final {final_loc}, reached={reached}")  # summary
     return reached
 
 '''Attempt moves up to a maximum retry count.'''
-def retry_to_reach(dest, max_retries=3):
+def retry_to_reach(dest, max_retries=None):
     """
     Args:
         dest (tuple): Target (x, y) pixel coordinates
-        max_retries (int): Number of attempts before giving up
+        max_retries (int): Number of attempts before giving up (default MAX_RETRIES)
+    Returns:
+        bool: True if the drone reported arrival
     """
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    FLOG.record(FLOG.WAYPOINT, x=dest[0], y=dest[1])  # leg start
     for attempt in range(1, max_retries + 1):
+        if geofence.breached():
+            break  # land instead of retrying
         if move_to_destination(dest):
             print(f"[UDP] Destination {dest} reached.")  # success message
-            return
+            FLOG.record(FLOG.ARRIVAL, x=dest[0], y=dest[1], value=1.0, attempt=attempt)
+            rate_control.set_phase("hover")  # holding at the waypoint
+            return True
         print(f"[UDP] Retry {attempt}/{max_retries} for {dest}")  # log retry
+        FLOG.record(FLOG.RETRY, x=dest[0], y=dest[1], attempt=attempt)
     print(f"[UDP] Failed to reach {dest} after {max_retries} attempts.")  # final failure
+    FLOG.record(FLOG.ARRIVAL, x=dest[0], y=dest[1], value=0.0, attempt=max_retries)
+    rate_control.set_phase("hover")  # holding after giving up
+    return False
 
-'''Drive through all waypoints defined in GUI list.'''
+'''Drive through all waypoints in the mission destination list.'''
 def execute_mission():
     """
     Returns:
         tuple or None: Last waypoint reached, or None if list empty
     """
     last = None  # track last successful destination
-    for dest in gui.destination_list:  # iterate waypoints
+    total = len(mission.destination_list)
+    for i, dest in enumerate(mission.destination_list, start=1):  # iterate waypoints
+        if geofence.breached():
+            print("[UDP] Geofence breached; aborting mission.")  # land now
+            FLOG.record(FLOG.STATE, text="fence breach", value=float(geofence.FORBIDDEN))
+            break
+        telemetry.publish("target", dest)  # HUD: current target
+        telemetry.publish("progress", (i, total))  # HUD: waypoint i of total
         retry_to_reach(dest)  # perform movement with retries
         last = dest  # update last attempted
+    telemetry.publish("target", None)  # mission finished
     return last  # return last processed waypoint
 
 def initialize_and_start_stream():
@@ -110,31 +151,54 @@ def initialize_and_start_stream():
     Open the UDP socket, enter SDK mode, turn on the video stream,
     and launch the camera‐feed thread as soon as 'streamon' returns 'ok'.
     """
+    global link_generation
     UDP.connect()                # open UDP socket
-    time.sleep(DELAY)            # allow socket to settle
+    link_generation = AP.link_generation()  # socket belongs to this link
+    sleep(DELAY)            # allow socket to settle
 
     # enter SDK mode
     UDP.send_command('command')
-    time.sleep(DELAY)
+    sleep(DELAY)
 
     # request video stream
     response = UDP.send_command('streamon')
     if response == 'ok':
-        # start the feed thread immediately
-        threading.Thread(target=drone_feed_run, daemon=True).start()
+        if SHOW_FEED:
+            # start the feed thread immediately
+            from drone_feed import run as drone_feed_run  # camera feed (Windows display only)
+            threading.Thread(target=drone_feed_run, daemon=True).start()
         print('[UDP] Stream started successfully.')
-        time.sleep(DELAY)       # brief settling wait
+        sleep(DELAY)       # brief settling wait
     else:
         print('[UDP] Stream start failed.')
 
-'''Wait until GUI destination list is populated.'''
+'''Wait out a Wi-Fi drop and re-open the UDP socket after a reconnect.'''
+def ensure_link():
+    """
+    Blocks (up to LINK_TIMEOUT) until the drone AP link is up. If the AP
+    manager reconnected since the socket was opened, re-binds the socket
+    and re-enters SDK mode so the mission can continue.
+    """
+    global link_generation
+    if not AP.wait_ready(LINK_TIMEOUT):
+        print("[UDP] Drone link still down; sending anyway.")
+        return
+    if AP.link_generation() != link_generation:
+        print("[UDP] Drone link re-established; reopening socket.")
+        UDP.close_socket()
+        UDP.connect()
+        link_generation = AP.link_generation()
+        UDP.send_command('command')  # re-enter SDK mode
+        sleep(DELAY)
+
+'''Wait until the mission destination list is populated.'''
 def wait_for_mission():
     """
-    Blocks until gui.destination_list is non-empty.
+    Blocks until mission.destination_list is non-empty.
     """
     print("[UDP] Awaiting destination list...")  # idle state
-    while not gui.destination_list:  # busy-wait until GUI populates list
-        time.sleep(DELAY)  # reduce CPU usage
+    while not mission.destination_list:  # busy-wait until GUI or headless runner populates list
+        sleep(DELAY)  # reduce CPU usage
 
 '''Perform drone takeoff sequence.'''
 def takeoff_sequence():
@@ -142,9 +206,10 @@ def takeoff_sequence():
     Sends the necessary commands to prepare and take off.
     """
     print("[UDP] Mission start sequence")  # beginning mission
+    rate_control.set_phase("moving")  # climbing out
     for cmd in ('command', 'takeoff', 'up 150'):  # prep commands
         UDP.send_command(cmd)  # send each prep command
-        time.sleep(DELAY)  # pause after each
+        sleep(DELAY)  # pause after each
 
 '''Wait for initial vision fix.'''
 def wait_for_vision_fix():
@@ -152,8 +217,9 @@ def wait_for_vision_fix():
     Blocks until drone_location is set by vision thread.
     """
     print("[UDP] Waiting for vision fix...")  # prompt
+    rate_control.set_phase("approach")  # first fix as soon as possible
     while drone_location is None:  # spin until vision thread updates
-        time.sleep(0.1)  # short wait to avoid tight loop
+        sleep(0.1)  # short wait to avoid tight loop
     print(f"[UDP] First fix: {drone_location}")  # log initial position
 
 '''Report battery level and final drone location.'''
@@ -163,29 +229,41 @@ def report_status():
     """
     bat = UDP.send_command('battery?')  # query battery
     print(f"[UDP] Battery: {bat}")  # battery status
+    if bat.isdigit():
+        telemetry.publish("battery", int(bat))  # HUD battery
+        FLOG.record(FLOG.STATE, text="battery", value=float(bat))  # telemetry
     print(f"[UDP] Final drone_location: {drone_location}")  # position report
 
 '''Land the drone and cleanup UDP socket and GUI.'''
 def land_and_cleanup():
     """
-    Sends land command, closes socket, and clears GUI list.
+    Sends land command, closes socket, and clears the destination list.
     """
-    time.sleep(DELAY)  # wait before landing
+    sleep(DELAY)  # wait before landing
+    ensure_link()  # make sure the land command can get through
     UDP.send_command('land')  # land command
-    time.sleep(DELAY)  # wait for land completion
+    sleep(DELAY)  # wait for land completion
     UDP.close_socket()  # close UDP socket
-    gui.destination_list.clear()  # reset for next mission
+    mission.destination_list.clear()  # reset for next mission
+    rate_control.set_phase("idle")  # back on the ground
+
+'''Fly one mission from takeoff to landing.'''
+def run_mission():
+    FLOG.start()  # open a new flight log for this mission
+    geofence.reset()  # clear any breach from the previous mission
+    AP.wait_ready()  # block until joined to the drone AP
+    initialize_and_start_stream()  # ensure UDP and stream active
+    takeoff_sequence()  # lift off
+    wait_for_vision_fix()  # get first location fix
+    execute_mission()  # fly through all waypoints
+    report_status()  # battery and location
+    #flip_drone()  # optional flip command
+    land_and_cleanup()  # land and reset destination list
+    FLOG.stop()  # flush and close the flight log
 
 '''Main UDP logic loop triggering missions.'''
 def run():
     print("[UDP] UDP logic thread running...")  # startup notice
     while True:  # continuous operation
-        global drone_location  # update global from vision thread
         wait_for_mission()  # block until destinations provided
-        initialize_and_start_stream()  # ensure UDP and stream active
-        takeoff_sequence()  # lift off
-        wait_for_vision_fix()  # get first location fix
-        execute_mission()  # fly through all waypoints
-        report_status()  # battery and location
-        #flip_drone()  # optional flip command
-        land_and_cleanup()  # land and reset GUI
+        run_mission()  # take off, fly waypoints, land
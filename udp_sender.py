@@ -1,15 +1,22 @@
 # udp_sender.py
 
 import socket
+import threading
+import time
+import flight_log as FLOG
+import link_monitor as LINK
+import telemetry
 
 # ─── Tello and local configuration ───────────────────────────────────────────
 TELLO_IP   = '192.168.10.1'
 TELLO_PORT = 8889
 LOCAL_IPS  = ['192.168.10.2', '192.168.10.3']
 LOCAL_PORT = 9000
-TIMEOUT    = 15.0  # seconds to wait for a reply
+TIMEOUT    = 15.0  # default socket timeout; per-command timeouts come from link_monitor
 
 _sock = None
+_lock = threading.Lock()  # one exchange at a time (mission thread and keepalive)
+exchange = None  # stand-in for _exchange(cmd, timeout), e.g. simulate.py's drone
 
 def connect():
     """Try each LOCAL_IP in turn until bind() succeeds."""
@@ -22,6 +29,7 @@ def connect():
         try:
             _sock.bind((ip, LOCAL_PORT))
             print(f"✔ Bound to {ip}:{LOCAL_PORT}")
+            LINK.start_keepalive(keepalive)
             return _sock
         except OSError as e:
             print(f"✘ Could not bind to {ip}:{LOCAL_PORT} → {e}")
@@ -30,17 +38,31 @@ def connect():
     # if none worked, re-raise
     raise last_exc
 
-def send_tello(cmd: str) -> str:
-    """Send one SDK command and return the response (never blows up on bad bytes)."""
-    if _sock is None:
-        raise RuntimeError("Socket not connected: call connect() first")
+def _drain():
+    """Discard late replies to earlier, timed-out commands."""
+    _sock.setblocking(False)
+    try:
+        while True:
+            _sock.recvfrom(1024)
+    except OSError:
+        pass  # nothing left (or reset): buffer is clean
+
+def _exchange(cmd: str, timeout: float) -> str:
+    """Send one command and wait up to timeout for its reply; caller holds _lock."""
+    _drain()
+    _sock.settimeout(timeout)
+    LINK.mark_activity()
+    sent_at = time.monotonic()
     _sock.sendto(cmd.encode('utf-8'), (TELLO_IP, TELLO_PORT))
     try:
         resp, _ = _sock.recvfrom(1024)
     except socket.timeout:
+        LINK.record(cmd, None)
         return '(timeout)'
     except ConnectionResetError:
+        LINK.record(cmd, None)
         return '(connection reset)'
+    LINK.record(cmd, time.monotonic() - sent_at)
 
     # Try UTF-8, fall back silently if there's invalid bytes
     try:
@@ -49,13 +71,51 @@ def send_tello(cmd: str) -> str:
         text = resp.decode('utf-8', errors='ignore')
     return text.strip()
 
+def send_tello(cmd: str, timeout: float = None) -> str:
+    """Send one SDK command and return the response (never blows up on bad bytes)."""
+    if exchange is not None:
+        return exchange(cmd, timeout or TIMEOUT)
+    if _sock is None:
+        raise RuntimeError("Socket not connected: call connect() first")
+    with _lock:
+        return _exchange(cmd, timeout or TIMEOUT)
+
+def keepalive():
+    """Send a cheap query unless another exchange is in flight (keeps the Tello from auto-landing)."""
+    if _sock is None or not _lock.acquire(blocking=False):
+        return None
+    try:
+        response = _exchange(LINK.KEEPALIVE_CMD, LINK.timeout_for(LINK.KEEPALIVE_CMD))
+    except OSError:
+        return None  # socket closed underneath us
+    finally:
+        _lock.release()
+    telemetry.publish("link", LINK.state())
+    if response.isdigit():
+        telemetry.publish("battery", int(response))
+        FLOG.record(FLOG.STATE, text="battery", value=float(response))
+    return response
+
 def send_command(command: str) -> str:
-    """Send + print, retrying up to 5 times on '(timeout)'."""
+    """
+    Send + print with a link-adapted timeout. Queries are retried up to 5 times
+    on '(timeout)'; motion commands are sent once, since a resend would fly the
+    move again if only the reply was late (the caller re-plans from vision).
+    """
     for attempt in range(1, 6):
-        response = send_tello(command)
+        seq = FLOG.record_command(command, attempt)
+        sent_at = time.monotonic()
+        response = send_tello(command, LINK.timeout_for(command))
+        rtt = time.monotonic() - sent_at
+        FLOG.record(FLOG.RESPONSE, text=response, seq=seq, attempt=attempt, value=rtt)
+        telemetry.publish("command_ms", rtt * 1000)
+        telemetry.publish("link", LINK.state())
         print(f"Response: {response}")
         if response != '(timeout)':
             return response
+        if LINK.is_motion(command):
+            print(f"✘ Timeout for '{command}', not resending a move")
+            return response
         print(f"↻ Timeout #{attempt} for '{command}', retrying…")
     return response
 
@@ -63,6 +123,7 @@ def send_command(command: str) -> str:
 def close_socket():
     """Cleanly close the socket."""
     global _sock
+    LINK.stop_keepalive()
     if _sock:
         _sock.close()
         _sock = None
\ No newline at end of file
@@ -5,9 +5,18 @@ Processes live camera frames with a YOLO model, annotates detections,
 and shares drone position via UDP logic.
 """
 
+import time            # Latency and frame-rate timing
+import tracemalloc     # Per-frame allocation statistics (FRAME_STATS)
 import cv2             # OpenCV for image capture and display
+import numpy as np     # Synthetic frames for model warm-up
+import model_cache     # On-disk cache of exported models
+import rate_control    # Adaptive detection rate
+import startup         # Startup timing milestones
+import telemetry       # Live values for the GUI HUD
 import udp_logic       # Custom module for UDP-based drone communication
-from ultralytics import YOLO  # Ultralytics YOLO model API
+import flight_log      # Mission flight recorder
+import geofence        # Flight area and no-fly zone checks
+import dataset         # Hard-example capture for retraining
 
 # Configuration constants
 WEIGHTS       = "YOLOv11/runs/detect/train41/weights/best.pt"  # Path to trained model weights
@@ -15,17 +24,75 @@ CAM_IDX       = 1              # Camera index for cv2.VideoCapture
 PROC_W, PROC_H = 1920, 1080    # Resolution for processing frames
 OUT_W, OUT_H   = 1920, 1080    # Resolution for output/display scaling
 CONF_THR      = 0.3            # Confidence threshold for detections
+INFER_SIZE    = 640            # Model input size (matches train41 imgsz)
+EXPORT_FORMAT = "onnx"         # Cached export format for faster inference (None to disable)
+WARMUP_FRAMES = 3              # Synthetic inferences before the first real frame
+QUANTIZED     = False          # Use the gated INT8 CPU model if quantize.py built one
 DEBUG         = False          # Verbose model output flag
+SHOW_DISPLAY  = True           # Show the inference window (False when headless; skips annotation)
+FRAME_STATS   = False          # Print per-frame stage times and allocations every STATS_EVERY
+STATS_EVERY   = 5.0            # Seconds between frame statistics reports
 
 # Stores the last known drone position (x, y)
 last_location = None
 
-def initialize_model():
+# Mirror-image buffer reused for every frame (allocated on the first one)
+_mirrored = None
+
+def initialize_model(batched=False):
     """
     Load and return the YOLO model with specified weights.
+    Ultralytics (and PyTorch) are imported here, on first use.
+    Uses the cached EXPORT_FORMAT artifact when one exists for these
+    weights and INFER_SIZE; otherwise serves the .pt weights and builds
+    the cache in the background for the next launch.
+    batched: the caller infers several frames per call, so exported
+    models need a dynamic batch dimension.
     """
     print("[VISION] Loading YOLO model...")
-    return YOLO(WEIGHTS)
+    ultralytics = startup.timed_import("ultralytics")  # Ultralytics YOLO model API
+    t0 = time.perf_counter()
+
+    if QUANTIZED and not batched:
+        import quantize  # deferred: imports this module
+        int8_path = quantize.cached_int8(WEIGHTS, INFER_SIZE)  # lookup only: built offline
+        if int8_path:
+            print(f"[VISION] Using INT8 model {int8_path}")
+            model = ultralytics.YOLO(int8_path, task="detect")
+            startup.mark("model loaded", time.perf_counter() - t0)
+            return model
+        print("[VISION] INT8 model unavailable; using FP32.")
+
+    cached = model_cache.find(WEIGHTS, INFER_SIZE, EXPORT_FORMAT, batched) if EXPORT_FORMAT else None
+    if cached:
+        print(f"[VISION] Using cached model {cached}")
+        model = ultralytics.YOLO(cached, task="detect")
+    else:
+        model = ultralytics.YOLO(WEIGHTS)
+        if EXPORT_FORMAT:
+            model_cache.export_in_background(
+                lambda: ultralytics.YOLO(WEIGHTS), WEIGHTS, INFER_SIZE, EXPORT_FORMAT, batched
+            )
+
+    startup.mark("model loaded", time.perf_counter() - t0)
+    return model
+
+
+def warm_up(model, batch=1):
+    """
+    Run WARMUP_FRAMES inferences on synthetic frames at the camera
+    resolution, INFER_SIZE and batch size, so graph setup and allocator
+    growth happen before the first real frame.
+    """
+    frame = np.random.randint(0, 256, (PROC_H, PROC_W, 3), dtype=np.uint8)
+    source = [frame] * batch if batch > 1 else frame
+    latencies = []
+    for _ in range(WARMUP_FRAMES):
+        t0 = time.perf_counter()
+        model(source, imgsz=INFER_SIZE, verbose=DEBUG)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    print("[VISION] Warm-up latencies (ms): " + ", ".join(f"{ms:.0f}" for ms in latencies))
+    startup.mark("model ready", sum(latencies) / 1000)
 
 
 def initialize_camera():
@@ -60,71 +127,197 @@ def calculate_scale_factors():
     return scale_x, scale_y
 
 
-def process_frame(frame, model, scale_x, scale_y):
+def find_drone(boxes):
     """
-    Apply the YOLO model to a frame, annotate detections,
-    update drone position via udp_logic, and return annotated image.
+    Return the first drone detection (class ID 0) at or above CONF_THR
+    as integer (x1, y1, x2, y2) in frame pixels, or None.
     """
-    global last_location
-
-    # Mirror the frame horizontally for intuitive user view
-    frame = cv2.flip(frame, 1)
-    # Run inference (with optional verbose output)
-    results = model(frame, verbose=DEBUG)
-    boxes = results[0].boxes  # Detected bounding boxes
-    annotated = frame.copy()  # Copy frame for drawing
-    new_location = None       # To capture the first valid detection
-
-    # Iterate detections to find the drone (class ID 0)
     for box in boxes:
         cls_id = int(box.cls[0])             # Class of detection
         conf = float(box.conf[0])            # Confidence score
         if cls_id == 0 and conf >= CONF_THR:
             # Extract bounding box coordinates
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-            # Draw rectangle around the drone
-            cv2.rectangle(
-                annotated, (x1, y1), (x2, y2),
-                (0, 255, 0), 2
-            )
-            # Compute center point and scale to output coordinates
-            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
-            sx = int(cx * scale_x)
-            sy = OUT_H - int(cy * scale_y)
-            # Annotate coordinates on the frame
-            label = f"({sx},{sy})"
-            cv2.putText(
-                annotated, label,
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.9, (0, 255, 0), 2
-            )
-            new_location = (sx, sy)
-            break  # Only consider the first valid detection
+            return tuple(box.xyxy[0].cpu().numpy().astype(int))
+    return None
+
+
+def mirror(frame):
+    """
+    Flip a frame horizontally into the reused _mirrored buffer.
+    The result is overwritten by the next call.
+    """
+    global _mirrored
+    if _mirrored is None or _mirrored.shape != frame.shape:
+        _mirrored = np.empty_like(frame)
+    return cv2.flip(frame, 1, dst=_mirrored)
+
+
+def process_frame(frame, model, scale_x, scale_y):
+    """
+    Apply the YOLO model to a frame and update drone position via udp_logic.
+    Returns (mirrored, box, location): the mirrored frame (a reused buffer,
+    valid until the next call) and the detection for draw_detection.
+    """
+    # Mirror the frame horizontally for intuitive user view
+    mirrored = mirror(frame)
+    # Run inference (with optional verbose output)
+    # While capturing, lower the model's cutoff (default 0.25) to the whole uncertain band;
+    # find_drone still applies CONF_THR for navigation
+    extra = {"conf": dataset.BAND_LOW} if dataset.active() else {}
+    t0 = time.perf_counter()
+    results = model(mirrored, imgsz=INFER_SIZE, verbose=DEBUG, **extra)
+    telemetry.publish("inference_ms", (time.perf_counter() - t0) * 1000)
+    box = find_drone(results[0].boxes)
+    dataset.offer(mirrored, results[0])  # No-op unless capturing
+    new_location = None       # To capture the first valid detection
+
+    if box is not None:
+        x1, y1, x2, y2 = box
+        # Compute center point and scale to output coordinates
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        sx = int(cx * scale_x)
+        sy = OUT_H - int(cy * scale_y)
+        new_location = (sx, sy)
+
+    update_location(new_location)
+    return mirrored, box, new_location
+
+
+def draw_detection(image, box, location):
+    """
+    Annotate a detection in place (display stage only: the model is done
+    with the image, so no copy is needed).
+    """
+    if box is None:
+        return image
+    x1, y1, x2, y2 = box
+    # Draw rectangle around the drone
+    cv2.rectangle(
+        image, (x1, y1), (x2, y2),
+        (0, 255, 0), 2
+    )
+    # Annotate coordinates on the frame
+    label = f"({location[0]},{location[1]})"
+    cv2.putText(
+        image, label,
+        (x1, y1 - 10),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.9, (0, 255, 0), 2
+    )
+    return image
+
+
+def update_location(new_location):
+    """
+    Share a new drone fix with udp_logic, the flight log and the HUD,
+    or keep udp_logic on the last known location when there is none.
+    """
+    global last_location
 
     # Update UDP logic with new or last known location
     if new_location:
+        if last_location is None:
+            startup.mark("first detection")
+            startup.report()
         udp_logic.drone_location = new_location
+        geofence.on_fix(new_location)
+        flight_log.record(flight_log.FIX, x=new_location[0], y=new_location[1])
+        telemetry.publish("position", new_location)
         last_location = new_location
     elif last_location:
         udp_logic.drone_location = last_location
 
-    return annotated
+
+class FrameStats:
+    def __init__(self):
+        """
+        Accumulate per-stage frame times and, through tracemalloc, the
+        bytes allocated while processing each frame.
+        """
+        self.stages = {}           # Stage name -> total seconds
+        self.frames = 0
+        self.allocated = 0         # Sum of per-frame allocation peaks (bytes)
+        self.since = time.perf_counter()
+        self.t = self.since
+        self.base = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self):
+        """
+        Start timing a frame and reset the allocation peak.
+        """
+        tracemalloc.reset_peak()
+        self.base = tracemalloc.get_traced_memory()[0]
+        self.t = time.perf_counter()
+
+    def lap(self, stage):
+        """
+        Charge the time since the previous lap to stage.
+        """
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.t
+        self.t = now
+
+    def end(self):
+        """
+        Finish a frame; print and reset the averages every STATS_EVERY.
+        """
+        self.frames += 1
+        self.allocated += tracemalloc.get_traced_memory()[1] - self.base
+        if self.t - self.since < STATS_EVERY:
+            return
+        total = sum(self.stages.values()) / self.frames * 1000
+        stages = ", ".join(f"{name} {sec / self.frames * 1000:.1f}" for name, sec in self.stages.items())
+        print(f"[VISION] {total:.1f} ms/frame ({stages}), "
+              f"{self.allocated / self.frames / 1e6:.2f} MB allocated/frame over {self.frames} frames")
+        self.stages, self.frames, self.allocated, self.since = {}, 0, 0, self.t
 
 
 def main_loop(cap, model, scale_x, scale_y):
     """
-    Capture frames in a loop, process and display them,
-    exit on 'q' key press.
+    Capture frames in a loop, process the ones the rate controller
+    selects and display them, exit on 'q' key press.
     """
+    controller = rate_control.RateController()
+    stats = FrameStats() if FRAME_STATS else None
+    fps = 0.0
+    last = time.perf_counter()
+    frame = None                     # Capture buffer, reused by cap.retrieve
     while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
+        if not cap.grab():           # Always grab, so the camera buffer never goes stale
             print("[VISION] Frame grab failed, exiting.")
             break
 
-        annotated = process_frame(frame, model, scale_x, scale_y)
-        cv2.imshow("YOLO Inference", annotated)
+        now = time.perf_counter()
+        if not controller.should_infer(now):
+            if SHOW_DISPLAY and cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+            continue
+        success, frame = cap.retrieve(frame)  # Decode only the frames that are processed
+        if not success:
+            continue
+
+        # Smoothed detection rate for the HUD
+        if now > last:
+            fps = 0.9 * fps + 0.1 / (now - last) if fps else 1.0 / (now - last)
+        last = now
+        telemetry.publish("fps", fps)
+
+        if stats:
+            stats.begin()
+        mirrored, box, location = process_frame(frame, model, scale_x, scale_y)
+        controller.report(now, time.perf_counter() - now, last_location)
+        if stats:
+            stats.lap("process")
+        if not SHOW_DISPLAY:
+            if stats:
+                stats.end()
+            continue
+        cv2.imshow("YOLO Inference", draw_detection(mirrored, box, location))
+        if stats:
+            stats.lap("display")
+            stats.end()
 
         # Exit loop if 'q' is pressed
         if cv2.waitKey(1) & 0xFF == ord("q"):
@@ -137,8 +330,12 @@ def run():
     then start the main processing loop.
     """
     model = initialize_model()
+    warm_up(model)
+    if dataset.ENABLED:
+        dataset.start()
     cap = initialize_camera()
-    setup_display()
+    if SHOW_DISPLAY:
+        setup_display()
     scale_x, scale_y = calculate_scale_factors()
 
     main_loop(cap, model, scale_x, scale_y)
@@ -146,6 +343,7 @@ def run():
     # Cleanup resources
     cap.release()
     cv2.destroyAllWindows()
+    dataset.stop()
     print("[VISION] Thread ending.")
 
 